@@ -0,0 +1,108 @@
+import gzip
+import re
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Ответы сжимаются быстрее, чем статика в core.storage: уровни
+# подобраны так, чтобы сжатие страницы ленты занимало доли миллисекунды.
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript',
+                      'application/xml', 'image/svg+xml')
+
+# Содержимое этих тегов выводится как есть.
+PRESERVED = re.compile(r'<(pre|textarea|script|style)\b.*?</\1\s*>',
+                       re.S | re.I)
+# Комментарии HTML, кроме условных комментариев IE.
+COMMENT = re.compile(r'<!--(?!\[if).*?-->', re.S)
+
+
+def _collapse(html):
+    html = COMMENT.sub('', html)
+    lines = (line.strip() for line in html.split('\n'))
+    collapsed = '\n'.join(line for line in lines if line)
+    # Пробел на границе с pre, script и другими сохранёнными тегами
+    # значим: вместо него остаётся перевод строки.
+    if html[:1].isspace():
+        collapsed = '\n' + collapsed
+    if html[-1:].isspace() and collapsed.strip():
+        collapsed += '\n'
+    return collapsed
+
+
+def minify_html(html):
+    """Убирает комментарии, отступы и пустые строки, которые оставляют
+    шаблоны. Пробелы внутри строк не трогает, содержимое pre, textarea,
+    script и style выводит как есть: браузер отрисует страницу так же."""
+    parts = []
+    position = 0
+    for match in PRESERVED.finditer(html):
+        parts.append(_collapse(html[position:match.start()]))
+        parts.append(match.group())
+        position = match.end()
+    parts.append(_collapse(html[position:]))
+    return ''.join(parts)
+
+
+def is_compressible(content_type):
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+# Кодировки, которыми умеет сжимать сервер, от лучшей к худшей.
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def encode(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, GZIP_LEVEL, mtime=0)
+
+
+def best_encoding(encodings):
+    """Лучшая из принимаемых клиентом кодировок или None."""
+    for encoding in ENCODINGS:
+        if encoding in encodings:
+            return encoding
+    return None
+
+
+def minify_response(response):
+    """Минифицирует HTML ответа, если включён HTML_MINIFY. Ответ
+    минифицируется один раз: повторный вызов, например для страницы
+    из кеша страниц, ничего не делает."""
+    if getattr(response, 'minified', False):
+        return
+    if (not settings.HTML_MINIFY
+            or not response.get('Content-Type', '').startswith('text/html')):
+        return
+    try:
+        html = response.content.decode(response.charset)
+    except UnicodeDecodeError:
+        return
+    response.content = minify_html(html).encode(response.charset)
+    if response.has_header('Content-Length'):
+        response['Content-Length'] = str(len(response.content))
+    response.minified = True
+
+
+def precompress(response):
+    """Готовит ответ к хранению в кеше: минифицирует его и сжимает
+    всеми кодировками ENCODINGS. Сжатые тела хранятся вместе с ответом
+    в compressed_bodies, и CompressionMiddleware отдаёт их без повторного
+    сжатия при каждом попадании в кеш."""
+    if response.streaming or response.has_header('Content-Encoding'):
+        return
+    minify_response(response)
+    if (not is_compressible(response.get('Content-Type', ''))
+            or len(response.content) < settings.COMPRESSION_MIN_SIZE):
+        return
+    response.compressed_bodies = {
+        encoding: encode(response.content, encoding)
+        for encoding in ENCODINGS
+    }
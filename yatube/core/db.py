@@ -0,0 +1,22 @@
+import re
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+PRAGMA_NAME = re.compile(r'^\w+$')
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    """Выставляет новому соединению с SQLite прагмы из SQLITE_PRAGMAS.
+    Прагмы вроде synchronous и cache_size действуют только на
+    соединение, поэтому выставляются при каждом подключении.
+    Прагмы выполняются на соединении sqlite3 напрямую, как и служебные
+    запросы самого Django, и не попадают в счётчики запросов."""
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        if not PRAGMA_NAME.match(name):
+            raise ValueError(f'Недопустимое имя прагмы {name!r}')
+        connection.connection.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,10 @@
+from django.contrib.auth.decorators import user_passes_test
+
+
+def staff_required(view):
+    """Пускает к представлению только активных сотрудников, остальных
+    отправляет на страницу входа. В отличие от staff_member_required
+    не загружает django.contrib.admin, которого нет
+    в yatube.settings_readonly."""
+    return user_passes_test(
+        lambda user: user.is_active and user.is_staff)(view)
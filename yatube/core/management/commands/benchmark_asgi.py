@@ -0,0 +1,154 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.test import Client
+from django.urls import reverse
+
+from core.asgi import ASGIHandler, build_environ
+from posts.benchmark import benchmark_database
+from posts.models import Group, Post, User
+
+
+def http_scope(path, cookie):
+    headers = [(b'host', b'testserver')]
+    if cookie:
+        headers.append((b'cookie', cookie.encode('latin-1')))
+    return {
+        'type': 'http',
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'query_string': b'',
+        'root_path': '',
+        'headers': headers,
+        'server': ('testserver', 80),
+        'client': ('127.0.0.1', 0),
+    }
+
+
+def run_wsgi(application, scopes):
+    """Последовательно выполняет запросы, как синхронный WSGI-воркер."""
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split(' ', 1)[0]))
+
+    for scope in scopes:
+        response = application(build_environ(scope, b''), start_response)
+        try:
+            b''.join(response)
+        finally:
+            response.close()
+    return statuses
+
+
+async def asgi_request(application, scope, semaphore):
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    async with semaphore:
+        await application(scope, receive, send)
+    return messages[0]['status']
+
+
+async def run_asgi(application, scopes, concurrency):
+    """Выполняет запросы через ASGI, не больше concurrency одновременно."""
+    semaphore = asyncio.Semaphore(concurrency)
+    return await asyncio.gather(*(
+        asgi_request(application, scope, semaphore) for scope in scopes))
+
+
+def throughput(requests, seconds):
+    return {
+        'requests': requests,
+        'seconds': round(seconds, 3),
+        'requests_per_second': round(requests / seconds, 1),
+    }
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает пропускную способность страниц для чтения '
+            'при одновременных запросах: синхронный WSGI-воркер '
+            'и ASGI с пулом потоков. Пишет отчёт в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--threads', type=int,
+                            help='Потоков ASGI; по умолчанию ASGI_THREADS')
+        parser.add_argument('--anonymous', action='store_true',
+                            help='Запросы без входа: через кеш страниц')
+        parser.add_argument('--output', help='Файл; по умолчанию stdout')
+
+    def handle(self, *args, **options):
+        # БД в файле, как при развёртывании: SQLite в общей памяти
+        # блокирует таблицы целиком и искажает замер параллельных запросов.
+        with tempfile.TemporaryDirectory() as directory:
+            name = os.path.join(directory, 'benchmark.sqlite3')
+            with benchmark_database(name, posts=options['posts']):
+                report = self.benchmark(options)
+        output = json.dumps(report, ensure_ascii=False, indent=2,
+                            sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def benchmark(self, options):
+        author = User.objects.filter(posts__isnull=False).first()
+        group = Group.objects.filter(posts__isnull=False).first()
+        post = Post.objects.first()
+        cookie = None
+        if not options['anonymous']:
+            client = Client()
+            client.force_login(author)
+            cookie = 'sessionid={}'.format(client.cookies['sessionid'].value)
+        paths = [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(group.slug,)),
+            reverse('posts:profile', args=(author.username,)),
+            reverse('posts:post_detail', args=(post.pk,)),
+            reverse('about:author'),
+            reverse('about:tech'),
+        ]
+        scopes = [http_scope(paths[number % len(paths)], cookie)
+                  for number in range(options['requests'])]
+        wsgi_application = get_wsgi_application()
+        asgi_application = ASGIHandler(wsgi_application, options['threads'])
+        # Прогрев шаблонов и кешей.
+        run_wsgi(wsgi_application, [http_scope(path, cookie)
+                                    for path in paths])
+
+        started = time.perf_counter()
+        statuses = run_wsgi(wsgi_application, scopes)
+        wsgi_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        statuses += asyncio.run(
+            run_asgi(asgi_application, scopes, options['concurrency']))
+        asgi_seconds = time.perf_counter() - started
+        asgi_application.executor.shutdown()
+
+        errors = [status for status in statuses if status >= 400]
+        return {
+            'concurrency': options['concurrency'],
+            'threads': asgi_application.threads,
+            'paths': paths,
+            'errors': len(errors),
+            'wsgi': throughput(len(scopes), wsgi_seconds),
+            'asgi': throughput(len(scopes), asgi_seconds),
+            'speedup': round(wsgi_seconds / asgi_seconds, 2),
+        }
@@ -0,0 +1,76 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.compression import brotli
+from posts.benchmark import benchmark_database
+from posts.models import Group, User
+
+# Имя варианта -> (HTML_MINIFY, Accept-Encoding).
+VARIANTS = {
+    'raw': (False, 'identity'),
+    'minified': (True, 'identity'),
+    'gzip': (True, 'gzip'),
+}
+if brotli is not None:
+    VARIANTS['br'] = (True, 'br')
+
+
+class Command(BaseCommand):
+    help = ('Замеряет размер страниц лент на проводе: исходный HTML, '
+            'HTML без отступов шаблонов и сжатый gzip и brotli (если '
+            'установлен), и время ответа в каждом варианте.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000,
+                            help='Постов в тестовой БД')
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Запросов на страницу и вариант')
+
+    def handle(self, *args, **options):
+        with benchmark_database(posts=options['posts']):
+            report = self.measure(options['requests'])
+        self.stdout.write(json.dumps(
+            report, ensure_ascii=False, indent=2, sort_keys=True))
+
+    def pages(self):
+        author = User.objects.filter(posts__isnull=False).first()
+        group = Group.objects.filter(posts__isnull=False).first()
+        return author, {
+            'index': reverse('posts:index'),
+            'group_posts': reverse('posts:group_list', args=(group.slug,)),
+            'profile': reverse('posts:profile', args=(author.username,)),
+            'post_detail': reverse(
+                'posts:post_detail', args=(author.posts.first().pk,)),
+        }
+
+    def measure(self, repeat):
+        author, pages = self.pages()
+        client = Client()
+        client.force_login(author)
+        report = {}
+        for page, url in pages.items():
+            report[page] = {}
+            for variant, (minify, encoding) in VARIANTS.items():
+                with override_settings(HTML_MINIFY=minify):
+                    # Первый запрос прогревает шаблоны и кеши.
+                    response = client.get(
+                        url, HTTP_ACCEPT_ENCODING=encoding)
+                    timings = []
+                    for _ in range(repeat):
+                        started = time.perf_counter()
+                        client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+                        timings.append(
+                            (time.perf_counter() - started) * 1000)
+                report[page][variant] = {
+                    'bytes': len(response.content),
+                    'mean_ms': round(statistics.mean(timings), 3),
+                }
+            raw = report[page]['raw']['bytes']
+            for result in report[page].values():
+                result['ratio'] = round(result['bytes'] / raw, 3)
+        return report
@@ -0,0 +1,72 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand
+
+from core.startup import (import_times, is_project_module, measure_startup,
+                          package_totals)
+
+
+class Command(BaseCommand):
+    help = ('Показывает, сколько стоит импорт модулей при запуске воркера '
+            '(python -X importtime), и сравнивает время запуска и память '
+            'воркера с разными настройками.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--settings-module',
+            default=os.environ.get('DJANGO_SETTINGS_MODULE'),
+            help='Настройки воркера; по умолчанию текущие')
+        parser.add_argument('--top', type=int, default=20,
+                            help='Сколько самых долгих модулей показать')
+        parser.add_argument('--project', action='store_true',
+                            help='Только модули проекта')
+        parser.add_argument(
+            '--compare', nargs='+', metavar='SETTINGS', default=[],
+            help='Сравнить запуск с этими настройками')
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument('--json', action='store_true',
+                            help='Вывести отчёт в JSON')
+
+    def handle(self, *args, **options):
+        settings_module = options['settings_module']
+        modules = import_times(settings_module)
+        hints = []
+        if any(item['module'] == 'pkg_resources' for item in modules):
+            hints.append(
+                'pkg_resources загружается через distutils из setuptools: '
+                'запускайте воркеры с SETUPTOOLS_USE_DISTUTILS=stdlib')
+        if options['project']:
+            modules = [item for item in modules
+                       if is_project_module(item['module'])]
+        report = {
+            'settings': settings_module,
+            'packages_us': package_totals(modules),
+            'hints': hints,
+            'slowest': sorted(modules, key=lambda item: -item['self_us'])[
+                :options['top']],
+        }
+        if options['compare']:
+            report['startup'] = [
+                measure_startup(module, options['runs'])
+                for module in (settings_module, *options['compare'])
+            ]
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write(f'Импорт при запуске воркера ({settings_module})')
+        self.stdout.write(f'{"мкс":>10} {"всего мкс":>10}  модуль')
+        for item in report['slowest']:
+            self.stdout.write('{self_us:>10} {cumulative_us:>10}  {module}'
+                              .format(**item))
+        self.stdout.write('\nПо пакетам, мкс')
+        for package, total in list(report['packages_us'].items())[:10]:
+            self.stdout.write(f'{total:>10}  {package}')
+        if report.get('startup'):
+            self.stdout.write('')
+        for result in report.get('startup', ()):
+            self.stdout.write(
+                '{settings}: запуск {startup_ms} мс, RSS {rss_mb} МБ, '
+                'модулей {modules}'.format(**result))
+        for hint in hints:
+            self.stdout.write(self.style.WARNING(hint))
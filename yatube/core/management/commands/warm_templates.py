@@ -0,0 +1,73 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.template import Engine
+from django.test import override_settings
+
+from core.templates import template_loaders, template_names, warm_templates
+from posts.benchmark import benchmark_database, run_benchmark
+
+PAGES = ('index', 'group_posts', 'profile', 'post_detail')
+
+
+class Command(BaseCommand):
+    help = ('Компилирует все шаблоны проекта и завершается с ошибкой, '
+            'если какой-то шаблон не разбирается или подключает '
+            'несуществующий. С --benchmark сравнивает отрисовку страниц '
+            'с кешем шаблонов и без него.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--benchmark', action='store_true',
+                            help='Замерить страницы с кешем шаблонов '
+                                 'и без него, отчёт в JSON')
+        parser.add_argument('--posts', type=int, default=1000,
+                            help='Постов в тестовой БД для замеров')
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Запросов на страницу')
+
+    def handle(self, *args, **options):
+        errors = warm_templates()
+        for name, (error, parent) in sorted(errors.items()):
+            source = f' (подключается из {parent})' if parent else ''
+            self.stderr.write(f'{name}{source}: {error}')
+        if errors:
+            raise CommandError(f'Шаблонов с ошибками: {len(errors)}')
+        names = template_names(Engine.get_default())
+        self.stdout.write(f'Скомпилировано шаблонов: {len(names)}')
+        if options['benchmark']:
+            report = self.benchmark(options['posts'], options['requests'])
+            self.stdout.write(json.dumps(
+                report, ensure_ascii=False, indent=2, sort_keys=True))
+
+    def benchmark(self, posts, repeat):
+        report = {}
+        with benchmark_database(posts=posts):
+            for name, cached in (('uncached', False), ('cached', True)):
+                with override_settings(TEMPLATES=template_loaders(cached)):
+                    engine = Engine.get_default()
+                    warm_templates(engine)
+                    report[name] = {
+                        'load_all_ms': self.load_all(engine, repeat),
+                        'pages': run_benchmark(repeat, PAGES)['results'],
+                    }
+        report['speedup'] = {
+            page: round(
+                report['uncached']['pages'][page]['mean_ms']
+                / report['cached']['pages'][page]['mean_ms'], 2)
+            for page in PAGES
+        }
+        return report
+
+    def load_all(self, engine, repeat):
+        """Среднее время загрузки всех шаблонов проекта в мс:
+        без кеша это разбор файлов, с кешем - поиск в словаре."""
+        names = template_names(engine)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for name in names:
+                engine.get_template(name)
+            timings.append((time.perf_counter() - started) * 1000)
+        return round(statistics.mean(timings), 3)
@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+
+# Метрики запроса, которые собираются в скользящие окна по представлениям.
+FIELDS = ('total_ms', 'db_queries', 'db_ms', 'template_ms', 'size')
+PERCENTILES = (50, 90, 99)
+
+_local = threading.local()
+
+
+class RequestMetrics:
+    """Метрики одного запроса: время ответа, запросы к БД,
+    отрисовка шаблонов и размер ответа."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.total_ms = 0.0
+        self.size = None
+
+    def finish(self, size):
+        self.total_ms = (time.perf_counter() - self.started) * 1000
+        self.size = size
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in FIELDS}
+
+
+def current_metrics():
+    """Метрики запроса, который обрабатывается в этом потоке, или None."""
+    return getattr(_local, 'metrics', None)
+
+
+def start_request():
+    _local.metrics = RequestMetrics()
+    return _local.metrics
+
+
+def end_request():
+    _local.metrics = None
+
+
+class DatabaseTimer:
+    """Обёртка для connection.execute_wrapper: считает запросы
+    и суммарное время их выполнения."""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.metrics.db_queries += 1
+            self.metrics.db_ms += (time.perf_counter() - started) * 1000
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    index = min(len(values) - 1, round(percent / 100 * (len(values) - 1)))
+    return values[index]
+
+
+class ViewStats:
+    """Скользящие окна метрик по имени URL (posts:index, posts:profile...).
+    В окне хранятся последние PERFORMANCE_WINDOW запросов."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(self._window)
+
+    @staticmethod
+    def _window():
+        return deque(maxlen=settings.PERFORMANCE_WINDOW)
+
+    def add(self, url_name, metrics):
+        with self._lock:
+            self._samples[url_name].append(metrics.as_dict())
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self):
+        """Возвращает для каждого имени URL число запросов в окне
+        и перцентили каждой метрики."""
+        with self._lock:
+            samples = {name: list(window)
+                       for name, window in self._samples.items()}
+        summary = {}
+        for name, window in sorted(samples.items()):
+            view = {'requests': len(window)}
+            for field in FIELDS:
+                values = [sample[field] for sample in window
+                          if sample[field] is not None]
+                if not values:
+                    continue
+                view[field] = {
+                    f'p{percent}': round(percentile(values, percent), 3)
+                    for percent in PERCENTILES
+                }
+            summary[name] = view
+        return summary
+
+
+view_stats = ViewStats()
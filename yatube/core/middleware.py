@@ -0,0 +1,240 @@
+import logging
+import mimetypes
+import os
+import posixpath
+import re
+from contextlib import ExitStack
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.db import connections
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from . import routers
+from .compression import (best_encoding, encode, is_compressible,
+                          minify_response)
+from .metrics import DatabaseTimer, end_request, start_request, view_stats
+from .queries import QueryAuditError, QueryAuditor
+from .storage import accepted_encodings, compressed_path
+
+logger = logging.getLogger('core.performance')
+query_logger = logging.getLogger('core.queries')
+
+
+def _url_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    return match.view_name
+
+
+def server_timing(metrics):
+    """Значение заголовка Server-Timing по метрикам запроса."""
+    return ', '.join((
+        'db;dur={:.1f};desc="{} queries"'.format(
+            metrics.db_ms, metrics.db_queries),
+        'tpl;dur={:.1f}'.format(metrics.template_ms),
+        'total;dur={:.1f}'.format(metrics.total_ms),
+    ))
+
+
+class PerformanceMiddleware:
+    """Замеряет время ответа, число и время запросов к БД, время отрисовки
+    шаблонов и размер ответа. Отдаёт их в заголовке Server-Timing, пишет
+    в лог core.performance и копит скользящие перцентили по имени URL."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = start_request()
+        try:
+            with ExitStack() as stack:
+                timer = DatabaseTimer(metrics)
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timer))
+                response = self.get_response(request)
+        finally:
+            end_request()
+        # Размер потокового ответа заранее неизвестен.
+        size = None if response.streaming else len(response.content)
+        metrics.finish(size)
+        url_name = _url_name(request)
+        view_stats.add(url_name, metrics)
+        response['Server-Timing'] = server_timing(metrics)
+        level = (logging.WARNING
+                 if metrics.total_ms >= settings.PERFORMANCE_SLOW_REQUEST_MS
+                 else logging.INFO)
+        logger.log(
+            level,
+            'view=%s method=%s status=%s total_ms=%.1f db_queries=%d '
+            'db_ms=%.1f template_ms=%.1f size=%s',
+            url_name, request.method, response.status_code,
+            metrics.total_ms, metrics.db_queries, metrics.db_ms,
+            metrics.template_ms, size,
+            extra={'url_name': url_name, 'metrics': metrics.as_dict()},
+        )
+        return response
+
+
+class QueryAuditMiddleware:
+    """Проверяет запросы к БД каждого ответа: повторы одной формы SQL,
+    медленные запросы и бюджет из QUERY_BUDGETS по имени URL.
+    Найденные проблемы пишутся в лог core.queries. С QUERY_AUDIT_FAIL
+    (его включает core.runner.QueryAuditRunner в тестах) превышение
+    бюджета и повторы поднимают QueryAuditError; медленные запросы
+    зависят от машины и только пишутся в лог."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryAuditor() as auditor:
+            response = self.get_response(request)
+        url_name = _url_name(request)
+        auditor.budget = settings.QUERY_BUDGETS.get(url_name)
+        if settings.QUERY_AUDIT_FAIL:
+            failures = auditor.problems(slow=False)
+            if failures:
+                raise QueryAuditError('view={} path={} {}'.format(
+                    url_name, request.path, '\n'.join(failures)))
+        for problem in auditor.problems():
+            query_logger.warning(
+                'view=%s path=%s %s', url_name, request.path, problem,
+                extra={'url_name': url_name},
+            )
+        return response
+
+
+class ReplicaMiddleware:
+    """Направляет чтения представлений из REPLICA_VIEWS в реплики.
+    После запроса с записью в БД ставит cookie, и следующие
+    PRIMARY_PIN_SECONDS секунд пользователь читает из основной БД.
+    Без DATABASE_REPLICAS ничего не делает."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+        try:
+            with connections[routers.PRIMARY].execute_wrapper(
+                    routers.track_writes):
+                response = self.get_response(request)
+            if routers.wrote():
+                response.set_cookie(
+                    routers.PIN_COOKIE, '1',
+                    max_age=settings.PRIMARY_PIN_SECONDS,
+                    httponly=True, samesite='Lax',
+                )
+        finally:
+            routers.release()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (settings.DATABASE_REPLICAS
+                and request.method in ('GET', 'HEAD')
+                and routers.PIN_COOKIE not in request.COOKIES
+                and _url_name(request) in settings.REPLICA_VIEWS):
+            routers.use_replica()
+
+
+class StaticFilesMiddleware:
+    """Отдаёт статику из STATIC_ROOT, когда перед приложением нет
+    прокси, который отдавал бы её сам. Включается STATIC_SERVE.
+    Файлы с хешем в имени из манифеста браузер кеширует навсегда,
+    остальные перепроверяет по Last-Modified. Сжатые копии
+    из core.storage отдаются по Accept-Encoding."""
+
+    IMMUTABLE = 'public, max-age=31536000, immutable'
+    REVALIDATE = 'no-cache'
+
+    def __init__(self, get_response):
+        if not settings.STATIC_SERVE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.immutable = set(
+            getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+    def __call__(self, request):
+        if (request.method in ('GET', 'HEAD')
+                and request.path_info.startswith(settings.STATIC_URL)):
+            response = self.serve(
+                request, request.path_info[len(settings.STATIC_URL):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        name = posixpath.normpath(unquote(name)).lstrip('/')
+        try:
+            path = safe_join(settings.STATIC_ROOT, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+        stat = os.stat(path)
+        if not was_modified_since(
+                request.META.get('HTTP_IF_MODIFIED_SINCE'),
+                stat.st_mtime, stat.st_size):
+            response = HttpResponseNotModified()
+        else:
+            path, encoding = compressed_path(
+                path, request.META.get('HTTP_ACCEPT_ENCODING', ''))
+            content_type, _ = mimetypes.guess_type(name)
+            response = FileResponse(
+                open(path, 'rb'),
+                content_type=content_type or 'application/octet-stream')
+            response['Content-Length'] = os.path.getsize(path)
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        response['Vary'] = 'Accept-Encoding'
+        response['Cache-Control'] = (
+            self.IMMUTABLE if name in self.immutable else self.REVALIDATE)
+        return response
+
+
+class CompressionMiddleware:
+    """Убирает из HTML отступы и комментарии шаблонов (HTML_MINIFY)
+    и сжимает ответы от COMPRESSION_MIN_SIZE байт в br, если установлен
+    пакет brotli, или в gzip по Accept-Encoding. Потоковые ответы
+    и ответы, уже сжатые, например статика, не трогает. Ответы,
+    подготовленные precompress() для кеша страниц, повторно
+    не минифицируются и не сжимаются."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        minify_response(response)
+        if not is_compressible(response.get('Content-Type', '')):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        encoding = best_encoding(accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')))
+        if encoding is None:
+            return response
+        bodies = getattr(response, 'compressed_bodies', {})
+        content = bodies.get(encoding) or encode(response.content, encoding)
+        if len(content) >= len(response.content):
+            return response
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        response['Content-Encoding'] = encoding
+        # Сжатый ответ не совпадает побайтно с исходным.
+        if response.has_header('ETag'):
+            response['ETag'] = re.sub(r'^"', 'W/"', response['ETag'])
+        return response
@@ -0,0 +1,100 @@
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+# Литералы в SQL: строки, числа и списки параметров IN (...).
+STRING = re.compile(r"'(?:[^']|'')*'")
+NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_LIST = re.compile(r'\bIN \((?:[^()]*)\)', re.IGNORECASE)
+SPACES = re.compile(r'\s+')
+# Управление транзакциями не считается запросом к данным.
+TRANSACTION = re.compile(
+    r'^\s*(?:SAVEPOINT|RELEASE|ROLLBACK|BEGIN|COMMIT)\b', re.IGNORECASE)
+
+
+def sql_shape(sql):
+    """Приводит SQL к форме без литералов: запросы, которые отличаются
+    только значениями, получают одинаковую форму."""
+    sql = STRING.sub('?', sql)
+    sql = NUMBER.sub('?', sql)
+    sql = IN_LIST.sub('IN (...)', sql)
+    return SPACES.sub(' ', sql).strip()
+
+
+class QueryAuditError(AssertionError):
+    pass
+
+
+class QueryAuditor:
+    """Записывает запросы ко всем базам внутри блока with и находит
+    повторяющиеся формы SQL (признак N+1), медленные запросы и превышение
+    бюджета на число запросов.
+
+        with QueryAuditor(budget=5, fail=True):
+            client.get(url)
+
+    С fail=True при найденных проблемах выход из блока
+    поднимает QueryAuditError."""
+
+    def __init__(self, budget=None, slow_ms=None, fail=False,
+                 allow_duplicates=False):
+        self.budget = budget
+        self.slow_ms = (settings.QUERY_AUDIT_SLOW_MS
+                        if slow_ms is None else slow_ms)
+        self.fail = fail
+        self.allow_duplicates = allow_duplicates
+        self.queries = []
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        if TRANSACTION.match(sql):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                (sql, (time.perf_counter() - started) * 1000))
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stack.close()
+        if self.fail and exc_type is None:
+            problems = self.problems()
+            if problems:
+                raise QueryAuditError('\n'.join(problems))
+
+    @property
+    def duplicates(self):
+        """Формы SQL, выполненные больше одного раза, с числом повторов."""
+        shapes = Counter(sql_shape(sql) for sql, _ in self.queries)
+        return {shape: count for shape, count in shapes.items()
+                if count > 1}
+
+    @property
+    def slow(self):
+        return [(sql, duration) for sql, duration in self.queries
+                if duration >= self.slow_ms]
+
+    def problems(self, slow=True):
+        """Описания найденных проблем; пустой список, если их нет.
+        С slow=False медленные запросы не учитываются."""
+        problems = []
+        if self.budget is not None and len(self.queries) > self.budget:
+            problems.append('{} запросов при бюджете {}'.format(
+                len(self.queries), self.budget))
+        if not self.allow_duplicates:
+            for shape, count in self.duplicates.items():
+                problems.append(f'{count} одинаковых запросов: {shape}')
+        for sql, duration in self.slow if slow else ():
+            problems.append(f'медленный запрос {duration:.1f} мс: {sql}')
+        return problems
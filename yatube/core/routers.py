@@ -0,0 +1,91 @@
+import threading
+from itertools import count
+
+from django.conf import settings
+
+# Cookie, которая после записи направляет запросы пользователя в основную
+# БД, чтобы он сразу видел свой пост, а не отстающую реплику.
+PIN_COOKIE = 'primary_pin'
+PRIMARY = 'default'
+# Приложения, которые читаются только из основной БД: сессия, созданная
+# при входе, может ещё не дойти до реплики.
+PRIMARY_ONLY_APPS = {'sessions'}
+
+_local = threading.local()
+_lock = threading.Lock()
+_turn = count()
+# Сколько запросов сейчас читают из каждой реплики.
+_in_flight = {}
+
+
+def choose_replica():
+    """Выбирает реплику для запроса способом из REPLICA_SELECTION:
+    round_robin - по очереди, least_loaded - с наименьшим числом
+    запросов в обработке."""
+    replicas = settings.DATABASE_REPLICAS
+    with _lock:
+        if settings.REPLICA_SELECTION == 'least_loaded':
+            alias = min(replicas, key=lambda name: _in_flight.get(name, 0))
+        else:
+            alias = replicas[next(_turn) % len(replicas)]
+        _in_flight[alias] = _in_flight.get(alias, 0) + 1
+    return alias
+
+
+def use_replica():
+    """Направляет чтения текущего запроса в одну из реплик."""
+    if getattr(_local, 'replica', None) is None:
+        _local.replica = choose_replica()
+    return _local.replica
+
+
+def current_replica():
+    return getattr(_local, 'replica', None)
+
+
+# Операторы SQL, которые меняют данные.
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def track_writes(execute, sql, params, many, context):
+    """execute_wrapper основной БД: отмечает, что в запросе была запись.
+    Роутер для этого не подходит: db_for_write вызывают и get_or_create,
+    которые только читают."""
+    if sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+        _local.wrote = True
+    return execute(sql, params, many, context)
+
+
+def wrote():
+    """Была ли в текущем запросе запись в БД."""
+    return getattr(_local, 'wrote', False)
+
+
+def release():
+    """Сбрасывает состояние запроса и освобождает реплику."""
+    replica = getattr(_local, 'replica', None)
+    if replica is not None:
+        with _lock:
+            _in_flight[replica] -= 1
+    _local.replica = None
+    _local.wrote = False
+
+
+class ReplicaRouter:
+    """Читает из реплики, выбранной для запроса
+    core.middleware.ReplicaMiddleware, пишет в основную БД.
+    Вне запросов к представлениям для чтения всё идёт в основную БД."""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return PRIMARY
+        return current_replica() or PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
@@ -0,0 +1,17 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class QueryAuditRunner(DiscoverRunner):
+    """Запускает тесты с QUERY_AUDIT_FAIL: представление, которое
+    превысило бюджет запросов из QUERY_BUDGETS или повторило запрос,
+    роняет тест, а не только пишет предупреждение в лог."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._query_audit = override_settings(QUERY_AUDIT_FAIL=True)
+        self._query_audit.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._query_audit.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,96 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+
+# Что делает воркер при запуске: импорт модуля WSGI (настройка Django
+# и цепочка middleware) и загрузка всех URL с представлениями.
+WORKER_STARTUP = '''
+import importlib
+importlib.import_module({module!r})
+from django.urls import get_resolver
+get_resolver().url_patterns
+'''
+
+MEASURE = '''
+import json, resource, sys, time
+started = time.perf_counter()
+exec({code!r})
+print(json.dumps({{
+    'startup_ms': (time.perf_counter() - started) * 1000,
+    'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'modules': len(sys.modules),
+}}))
+'''
+
+PROJECT_PACKAGES = ('about', 'core', 'posts', 'users', 'yatube')
+
+
+def _run(settings_module, args):
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings_module}
+    return subprocess.run(
+        [sys.executable, *args], cwd=settings.BASE_DIR, env=env,
+        capture_output=True, text=True, check=True,
+    )
+
+
+def worker_startup():
+    return WORKER_STARTUP.format(
+        module=settings.WSGI_APPLICATION.rsplit('.', 1)[0])
+
+
+def import_times(settings_module):
+    """Время импорта каждого модуля при запуске воркера по данным
+    python -X importtime. Возвращает список словарей module, self_us,
+    cumulative_us в порядке импорта."""
+    stderr = _run(
+        settings_module, ['-X', 'importtime', '-c', worker_startup()]
+    ).stderr
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split(
+            '|')
+        modules.append({
+            'module': module.strip(),
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+        })
+    return modules
+
+
+def is_project_module(module):
+    return module.split('.')[0] in PROJECT_PACKAGES
+
+
+def package_totals(modules):
+    """Собственное время импорта, сложенное по пакетам верхнего уровня."""
+    totals = {}
+    for item in modules:
+        package = item['module'].split('.')[0]
+        totals[package] = totals.get(package, 0) + item['self_us']
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def measure_startup(settings_module, runs=5):
+    """Запускает воркер runs раз в отдельных процессах. Возвращает медиану
+    времени запуска, наибольший пиковый RSS и число загруженных модулей."""
+    samples = [
+        json.loads(_run(
+            settings_module,
+            ['-c', MEASURE.format(code=worker_startup())]
+        ).stdout)
+        for _ in range(runs)
+    ]
+    return {
+        'settings': settings_module,
+        'startup_ms': round(statistics.median(
+            sample['startup_ms'] for sample in samples), 1),
+        'rss_mb': round(max(
+            sample['rss_kb'] for sample in samples) / 1024, 1),
+        'modules': samples[-1]['modules'],
+    }
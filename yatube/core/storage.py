@@ -0,0 +1,77 @@
+import gzip
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Текстовые форматы, которые имеет смысл сжимать: картинки и шрифты
+# уже сжаты.
+COMPRESSIBLE = ('.css', '.js', '.svg', '.html', '.txt', '.json', '.xml',
+                '.map', '.ico')
+# Сжатая копия сохраняется, только если она хотя бы на 5% меньше.
+MIN_RATIO = 0.95
+
+
+def compressors():
+    """Кодировка Content-Encoding и функция сжатия: gzip всегда,
+    brotli - если установлен пакет brotli."""
+    yield 'gzip', '.gz', lambda data: gzip.compress(data, 9, mtime=0)
+    if brotli is not None:
+        yield 'br', '.br', brotli.compress
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Манифест статики с хешем содержимого в именах файлов и сжатыми
+    копиями рядом: style.3f2a1b.css.gz и style.3f2a1b.css.br.
+    Файлы с хешем в имени не меняются, поэтому их можно кешировать
+    навсегда (core.middleware.StaticFilesMiddleware)."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        # CSS обрабатывается в несколько проходов, и имя с хешем меняется
+        # с каждым: сжимаются только окончательные имена.
+        hashed_names = {}
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names[name] = hashed_name
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for hashed_name in hashed_names.values():
+            if hashed_name.endswith(COMPRESSIBLE):
+                self.compress(hashed_name)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as file:
+            data = file.read()
+        for _, suffix, compress in compressors():
+            compressed = compress(data)
+            if len(compressed) > len(data) * MIN_RATIO:
+                continue
+            with open(path + suffix, 'wb') as file:
+                file.write(compressed)
+
+
+def accepted_encodings(accept_encoding):
+    """Кодировки из заголовка Accept-Encoding, кроме запрещённых q=0."""
+    encodings = set()
+    for item in accept_encoding.split(','):
+        encoding, _, params = item.partition(';')
+        if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00'):
+            encodings.add(encoding.strip())
+    return encodings
+
+
+def compressed_path(path, accept_encoding):
+    """Путь к копии файла, сжатой кодировкой из Accept-Encoding,
+    и кодировка; (path, None), если подходящей сжатой копии нет."""
+    encodings = accepted_encodings(accept_encoding)
+    for encoding, suffix, _ in reversed(list(compressors())):
+        if encoding in encodings and os.path.exists(path + suffix):
+            return path + suffix, encoding
+    return path, None
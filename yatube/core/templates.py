@@ -0,0 +1,101 @@
+import copy
+import os
+import time
+
+from django.conf import settings
+from django.template import Engine, TemplateDoesNotExist, TemplateSyntaxError
+from django.template.backends.django import DjangoTemplates, Template
+from django.template.loader_tags import ExtendsNode, IncludeNode
+
+from .metrics import current_metrics
+
+
+class TimedTemplate(Template):
+    """Шаблон, который добавляет время отрисовки к метрикам запроса."""
+
+    def render(self, context=None, request=None):
+        metrics = current_metrics()
+        if metrics is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_ms += (time.perf_counter() - started) * 1000
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Бэкенд DjangoTemplates с замером времени отрисовки.
+    Вложенные {% include %} отрисовываются внутри шаблона верхнего уровня
+    и отдельно не считаются."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
+
+
+def template_loaders(cached):
+    """Копия settings.TEMPLATES с загрузчиками шаблонов из папок
+    и приложений: с кешем скомпилированных шаблонов или без."""
+    templates = copy.deepcopy(settings.TEMPLATES)
+    loaders = [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]
+    if cached:
+        loaders = [('django.template.loaders.cached.Loader', loaders)]
+    for template in templates:
+        template['APP_DIRS'] = False
+        template.setdefault('OPTIONS', {})['loaders'] = loaders
+    return templates
+
+
+def template_names(engine):
+    """Имена всех шаблонов в папках DIRS движка."""
+    names = []
+    for directory in engine.dirs:
+        for root, _, files in os.walk(directory):
+            for file in files:
+                path = os.path.relpath(os.path.join(root, file), directory)
+                names.append(path.replace(os.sep, '/'))
+    return sorted(names)
+
+
+def referenced_templates(template):
+    """Шаблоны, которые template подключает через {% extends %}
+    и {% include %} с постоянным именем."""
+    nodes = template.nodelist.get_nodes_by_type(ExtendsNode)
+    expressions = [node.parent_name for node in nodes]
+    nodes = template.nodelist.get_nodes_by_type(IncludeNode)
+    expressions += [node.template for node in nodes]
+    return {
+        expression.var for expression in expressions
+        if isinstance(expression.var, str) and not expression.filters
+    }
+
+
+def warm_templates(engine=None):
+    """Компилирует все шаблоны из DIRS и подключаемые ими шаблоны.
+    С кешированным загрузчиком после этого шаблоны не разбираются
+    при запросах. Возвращает словарь имя шаблона -> (ошибка, имя
+    подключившего его шаблона или None)."""
+    engine = engine or Engine.get_default()
+    errors = {}
+    compiled = set()
+    pending = [(name, None) for name in template_names(engine)]
+    while pending:
+        name, parent = pending.pop()
+        if name in compiled or name in errors:
+            continue
+        try:
+            template = engine.get_template(name)
+        except (TemplateDoesNotExist, TemplateSyntaxError) as error:
+            errors[name] = (error, parent)
+            continue
+        compiled.add(name)
+        pending.extend(
+            (child, name) for child in referenced_templates(template))
+    return errors
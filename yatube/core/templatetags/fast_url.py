@@ -0,0 +1,24 @@
+from django import template
+
+from core.urlbuilder import build_url, get_routes
+
+register = template.Library()
+
+
+@register.simple_tag
+def fast_url(viewname, *args, **kwargs):
+    """{% url %} на готовых шаблонах core.urlbuilder.
+
+    {% fast_url 'posts:post_detail' post.pk %}
+    """
+    return build_url(viewname, *args, **kwargs)
+
+
+@register.simple_tag
+def route_exists(viewname):
+    """Есть ли маршрут в текущем URLconf: облегчённые URL
+    (yatube.urls_readonly) подключают не все приложения.
+
+    {% route_exists 'users:login' as can_login %}
+    """
+    return viewname in get_routes()
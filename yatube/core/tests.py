@@ -0,0 +1,734 @@
+import asyncio
+import gzip
+import json
+import os
+import tempfile
+import time
+from http import HTTPStatus
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.core.management import CommandError, call_command
+from django.core.wsgi import get_wsgi_application
+from django.db import OperationalError, connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.http import HttpResponse, StreamingHttpResponse
+from django.template import Context, Engine, Template
+from django.test import (Client, RequestFactory, TestCase,
+                         TransactionTestCase, override_settings)
+from django.urls import (NoReverseMatch, resolve, reverse,
+                         set_script_prefix)
+
+from posts.counters import get_author_posts_count
+from posts.models import Group, Post, User
+
+from . import routers
+from .asgi import ASGIHandler
+from .compression import minify_html
+from .metrics import view_stats
+from .middleware import CompressionMiddleware, ReplicaMiddleware
+from .queries import QueryAuditError, QueryAuditor, sql_shape
+from .routers import ReplicaRouter
+from .startup import import_times
+from .storage import compressed_path
+from .templatetags.post_list import post_card, post_rows
+from .urlbuilder import build_url, get_routes
+from .templates import template_loaders, warm_templates
+
+
+class PerformanceMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.admin = User.objects.create_user(username='admin', is_staff=True)
+        cls.post = Post.objects.create(author=cls.user, text='Тестовый пост')
+
+    def setUp(self):
+        view_stats.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_server_timing_header(self):
+        """Ответ содержит время БД, шаблонов и полное время в Server-Timing."""
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', args=(self.post.pk,)))
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertRegex(timing, r'tpl;dur=[\d.]+')
+        self.assertRegex(timing, r'total;dur=[\d.]+')
+
+    def test_stats_by_url_name(self):
+        """Метрики копятся по имени URL."""
+        for _ in range(3):
+            self.authorized_client.get(reverse('posts:index'))
+        self.authorized_client.get(
+            reverse('posts:profile', args=(self.user.username,)))
+        summary = view_stats.summary()
+        self.assertEqual(summary['posts:index']['requests'], 3)
+        self.assertEqual(summary['posts:profile']['requests'], 1)
+        index = summary['posts:index']
+        for field in ('total_ms', 'db_queries', 'db_ms', 'template_ms',
+                      'size'):
+            with self.subTest(field=field):
+                self.assertLessEqual(index[field]['p50'], index[field]['p99'])
+        self.assertGreater(index['template_ms']['p50'], 0)
+        self.assertGreater(index['size']['p50'], 0)
+
+    def test_stats_endpoint_is_staff_only(self):
+        """Сводка доступна только сотрудникам."""
+        url = reverse('core:performance')
+        response = self.authorized_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        admin_client = Client()
+        admin_client.force_login(self.admin)
+        admin_client.get(reverse('posts:index'))
+        response = admin_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn('posts:index', response.json()['views'])
+
+
+class QueryAuditTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        for i in range(3):
+            Post.objects.create(author=cls.user, text=f'Пост {i}')
+
+    def setUp(self):
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+
+    def test_sql_shape(self):
+        """Запросы, отличающиеся только значениями, имеют одну форму."""
+        self.assertEqual(
+            sql_shape("SELECT * FROM t WHERE id = 1 AND name = 'a''b'"),
+            sql_shape("SELECT *  FROM t WHERE id = 25 AND name = 'c'"),
+        )
+        self.assertEqual(
+            sql_shape('SELECT * FROM t WHERE id IN (1, 2, 3)'),
+            'SELECT * FROM t WHERE id IN (...)',
+        )
+
+    def test_detects_duplicates_and_budget(self):
+        """Аудитор находит N+1 и превышение бюджета."""
+        with QueryAuditor(budget=2) as auditor:
+            for post in Post.objects.all():
+                post.author.username
+        self.assertEqual(len(auditor.queries), 4)
+        self.assertEqual(list(auditor.duplicates.values()), [3])
+        self.assertEqual(len(auditor.problems()), 2)
+        with self.assertRaises(QueryAuditError):
+            with QueryAuditor(fail=True):
+                for post in Post.objects.all():
+                    post.author.username
+        with QueryAuditor(fail=True) as auditor:
+            list(Post.objects.select_related('author'))
+        self.assertEqual(auditor.problems(), [])
+
+    def test_slow_queries(self):
+        """Запросы дольше порога считаются медленными."""
+        with QueryAuditor(slow_ms=0) as auditor:
+            Post.objects.count()
+        self.assertEqual(len(auditor.slow), 1)
+
+    @override_settings(QUERY_BUDGETS={'posts:index': 1},
+                       QUERY_AUDIT_FAIL=False)
+    def test_middleware_logs_exceeded_budget(self):
+        """Middleware пишет в лог превышение бюджета представлением."""
+        with self.assertLogs('core.queries', 'WARNING') as logs:
+            Client().get(reverse('posts:index'))
+        self.assertIn('view=posts:index', logs.output[0])
+        self.assertIn('бюджете 1', logs.output[0])
+
+    @override_settings(QUERY_BUDGETS={'posts:index': 1})
+    def test_middleware_fails_tests(self):
+        """В тестах превышение бюджета роняет запрос."""
+        self.assertTrue(settings.QUERY_AUDIT_FAIL)
+        with self.assertRaisesMessage(QueryAuditError, 'бюджете 1'):
+            Client().get(reverse('posts:index'))
+
+
+# Запросы выполняются в потоках пула со своими соединениями с БД,
+# поэтому данные теста должны быть сохранены, а не в транзакции теста.
+class ASGIHandlerTest(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='auth')
+        self.post = Post.objects.create(author=self.user, text='Тестовый пост')
+        caches['pages'].clear()
+        self.application = ASGIHandler(get_wsgi_application(), threads=2)
+        self.addCleanup(self.application.executor.shutdown)
+
+    def request(self, path, query_string=b''):
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': query_string,
+            'headers': [(b'host', b'testserver')],
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(self.application(scope, receive, send))
+        return messages
+
+    def test_page(self):
+        """Страница отдаётся через ASGI целиком."""
+        start, body = self.request(reverse('posts:index'))
+        self.assertEqual(start['status'], HTTPStatus.OK)
+        self.assertIn(
+            (b'content-type', b'text/html; charset=utf-8'), start['headers'])
+        self.assertIn(self.post.text, body['body'].decode())
+
+    def test_streaming_response(self):
+        """Потоковый ответ отдаётся кусками, последний - пустой."""
+        messages = self.request(
+            reverse('posts:api_index'), b'fields=id,text')
+        self.assertEqual(messages[0]['status'], HTTPStatus.OK)
+        self.assertTrue(all(
+            message['more_body'] for message in messages[1:-1]))
+        self.assertEqual(messages[-1]['body'], b'')
+        content = b''.join(message['body'] for message in messages[1:])
+        self.assertEqual(
+            json.loads(content)['results'],
+            [{'id': self.post.pk, 'text': self.post.text}]
+        )
+
+
+class SQLitePragmasTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'db.sqlite3')
+
+    def open_connection(self):
+        """Отдельное соединение с файлом БД, как у другого процесса."""
+        wrapper = DatabaseWrapper(
+            {**connection.settings_dict, 'NAME': self.path}, alias='file')
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied(self):
+        """Новое соединение получает прагмы из SQLITE_PRAGMAS."""
+        wrapper = self.open_connection()
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+        # NORMAL
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)
+        self.assertEqual(self.pragma(wrapper, 'cache_size'), -20000)
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 5000)
+
+    def write_and_read(self):
+        """Читает таблицу, пока другое соединение держит транзакцию
+        записи. Возвращает прочитанное число строк."""
+        writer = self.open_connection()
+        with writer.cursor() as cursor:
+            cursor.execute('CREATE TABLE post (text TEXT)')
+            cursor.execute("INSERT INTO post VALUES ('первый')")
+        reader = self.open_connection()
+        reader.ensure_connection()
+        with writer.cursor() as cursor:
+            cursor.execute('BEGIN EXCLUSIVE')
+            cursor.execute("INSERT INTO post VALUES ('второй')")
+        try:
+            with reader.cursor() as cursor:
+                cursor.execute('SELECT COUNT(*) FROM post')
+                return cursor.fetchone()[0]
+        finally:
+            with writer.cursor() as cursor:
+                cursor.execute('COMMIT')
+
+    def test_readers_do_not_wait_for_writer(self):
+        """С WAL чтение не ждёт незавершённую запись
+        и видит данные до её начала."""
+        started = time.perf_counter()
+        self.assertEqual(self.write_and_read(), 1)
+        self.assertLess(time.perf_counter() - started, 1)
+
+    @override_settings(
+        SQLITE_PRAGMAS={'busy_timeout': 100, 'journal_mode': 'delete'})
+    def test_readers_blocked_without_wal(self):
+        """Без WAL чтение ждёт запись и получает "database is locked"."""
+        with self.assertRaisesMessage(OperationalError, 'locked'):
+            self.write_and_read()
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class ReplicaRoutingTest(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+        self.addCleanup(routers._in_flight.clear)
+        self.addCleanup(routers.release)
+
+    def routed(self, method, path, cookies=None, action=None):
+        """Пропускает запрос через ReplicaMiddleware и возвращает
+        БД для чтения постов и сессий внутри представления и ответ.
+        action выполняется внутри представления."""
+        request = getattr(self.factory, method)(path)
+        request.COOKIES.update(cookies or {})
+        request.resolver_match = resolve(path)
+        routed = {}
+
+        def view(request):
+            routed['posts'] = self.router.db_for_read(Post)
+            routed['sessions'] = self.router.db_for_read(Session)
+            if action is not None:
+                action()
+            return HttpResponse()
+
+        middleware = ReplicaMiddleware(view)
+        middleware.process_view(request, view, (), {})
+        response = middleware(request)
+        return routed, response
+
+    def test_round_robin(self):
+        """Реплики выбираются по очереди."""
+        first = routers.choose_replica()
+        second = routers.choose_replica()
+        self.assertEqual({first, second}, {'replica1', 'replica2'})
+        self.assertEqual(routers.choose_replica(), first)
+
+    @override_settings(REPLICA_SELECTION='least_loaded')
+    def test_least_loaded(self):
+        """Выбирается реплика с наименьшим числом запросов в обработке."""
+        busy = routers.use_replica()
+        self.assertNotEqual(routers.choose_replica(), busy)
+
+    def test_read_only_views_use_replica(self):
+        """Лента читается из реплики, сессии - из основной БД."""
+        routed, _ = self.routed('get', reverse('posts:index'))
+        self.assertIn(routed['posts'], ('replica1', 'replica2'))
+        self.assertEqual(routed['sessions'], 'default')
+        self.assertIsNone(routers.current_replica())
+
+    def test_other_requests_use_primary(self):
+        """Формы, POST и запросы после записи читают из основной БД."""
+        for method, path, cookies in (
+            ('get', reverse('posts:post_create'), None),
+            ('post', reverse('posts:index'), None),
+            ('get', reverse('posts:index'), {routers.PIN_COOKIE: '1'}),
+        ):
+            with self.subTest(method=method, path=path, cookies=cookies):
+                routed, _ = self.routed(method, path, cookies)
+                self.assertEqual(routed['posts'], 'default')
+
+    def write(self):
+        Group.objects.create(title='Группа', slug='pinned')
+
+    def test_write_pins_user_to_primary(self):
+        """После записи ответ ставит cookie привязки к основной БД."""
+        _, response = self.routed(
+            'post', reverse('posts:post_create'), action=self.write)
+        cookie = response.cookies[routers.PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], settings.PRIMARY_PIN_SECONDS)
+        _, response = self.routed('get', reverse('posts:index'))
+        self.assertNotIn(routers.PIN_COOKIE, response.cookies)
+
+    def test_reads_do_not_pin(self):
+        """Чтение счётчика постов автора не считается записью."""
+        user = User.objects.create_user(username='reader')
+        Post.objects.create(author=user, text='Пост')
+        _, response = self.routed(
+            'get', reverse('posts:post_create'),
+            action=lambda: get_author_posts_count(user))
+        self.assertNotIn(routers.PIN_COOKIE, response.cookies)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_pin_without_replicas(self):
+        """Без реплик cookie привязки не ставится."""
+        _, response = self.routed(
+            'post', reverse('posts:post_create'), action=self.write)
+        self.assertNotIn(routers.PIN_COOKIE, response.cookies)
+
+
+class StartupProfileTest(TestCase):
+    def test_import_times(self):
+        """Профиль импорта содержит модули проекта, а облегчённые
+        настройки воркера не загружают admin и messages."""
+        full = {item['module'] for item in import_times('yatube.settings')}
+        slim = {item['module']
+                for item in import_times('yatube.settings_readonly')}
+        skipped = ('django.contrib.admin', 'django.contrib.messages')
+        self.assertIn('posts.views', full)
+        self.assertTrue(
+            {module for module in full if module.startswith(skipped)})
+        self.assertIn('posts.views', slim)
+        self.assertFalse(
+            {module for module in slim if module.startswith(skipped)})
+        self.assertLess(len(slim), len(full))
+
+    @override_settings(ROOT_URLCONF='yatube.urls_readonly')
+    def test_readonly_urls_serve_feeds(self):
+        """Облегчённый набор URL отдаёт ленты и страницы постов,
+        но не формы, API, выгрузку, админку и страницы входа;
+        шапка не ссылается на отсутствующие маршруты."""
+        user = User.objects.create_user(username='reader')
+        group = Group.objects.create(title='Группа', slug='group')
+        post = Post.objects.create(author=user, text='Пост', group=group)
+        for client in (Client(), self.client):
+            if client is self.client:
+                client.force_login(user)
+            for url in ('/', '/group/group/', '/profile/reader/',
+                        f'/posts/{post.pk}/', '/search/?q=пост'):
+                with self.subTest(url=url):
+                    response = client.get(url)
+                    self.assertEqual(response.status_code, HTTPStatus.OK)
+                    self.assertNotContains(response, '/auth/')
+                    self.assertNotContains(response, '/create/')
+        for url in ('/admin/', '/create/', f'/posts/{post.pk}/edit/',
+                    '/api/posts/', '/export/', '/cache/stats/',
+                    '/auth/signup/', '/auth//login/'):
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.client.get(url).status_code, HTTPStatus.NOT_FOUND)
+
+    def test_header_links_to_auth_pages(self):
+        """С полным набором URL шапка ссылается на вход и регистрацию."""
+        response = Client().get(reverse('posts:index'))
+        self.assertContains(response, reverse('users:login'))
+        self.assertContains(response, reverse('users:signup'))
+
+
+class WarmTemplatesTest(TestCase):
+    def test_project_templates_compile(self):
+        """Все шаблоны проекта разбираются без ошибок."""
+        stdout = StringIO()
+        call_command('warm_templates', stdout=stdout)
+        self.assertIn('Скомпилировано шаблонов', stdout.getvalue())
+
+    @override_settings(TEMPLATES=template_loaders(cached=True))
+    def test_cached_loader_is_warmed(self):
+        """После прогрева шаблоны и их include лежат в кеше загрузчика."""
+        self.assertEqual(warm_templates(), {})
+        loader, = Engine.get_default().template_loaders
+        self.assertTrue({
+            'base.html', 'includes/header.html', 'includes/post.html',
+            'posts/includes/paginator.html',
+        } <= set(loader.get_template_cache))
+
+    def test_template_errors_fail_command(self):
+        """Ошибка разбора и подключение несуществующего шаблона
+        роняют команду."""
+        with tempfile.TemporaryDirectory() as directory:
+            for name, code in (
+                ('broken.html', '{% if %}'),
+                ('page.html', "{% include 'missing.html' %}"),
+            ):
+                with open(os.path.join(directory, name), 'w') as file:
+                    file.write(code)
+            templates = template_loaders(cached=False)
+            templates[0]['DIRS'] = [directory]
+            with override_settings(TEMPLATES=templates):
+                errors = warm_templates()
+                with self.assertRaises(CommandError):
+                    call_command('warm_templates', stderr=StringIO())
+        self.assertEqual(set(errors), {'broken.html', 'missing.html'})
+        self.assertEqual(errors['missing.html'][1], 'page.html')
+
+
+class PostListTagTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='auth', first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='test-slug', description='')
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text='Пост в группе')
+        cls.loner = Post.objects.create(author=cls.user, text='Пост')
+
+    def test_rows(self):
+        """Строки ленты совпадают с тем, что выводил шаблон карточки."""
+        rows = post_rows(Post.objects.feed())
+        self.assertEqual(len(rows), 2)
+        row = next(row for row in rows if row['pk'] == self.post.pk)
+        self.assertEqual(row['author_name'], 'Лев Толстой')
+        self.assertEqual(row['group_slug'], self.group.slug)
+        self.assertEqual(row['group_url'], reverse(
+            'posts:group_list', args=(self.group.slug,)))
+        self.assertEqual(row['detail_url'], reverse(
+            'posts:post_detail', args=(self.post.pk,)))
+        self.assertIn(
+            Template('{{ date|date:"d E Y" }}').render(
+                Context({'date': self.post.pub_date})),
+            row['body'])
+        self.assertIn(self.post.text, row['body'])
+        row = next(row for row in rows if row['pk'] == self.loner.pk)
+        self.assertIsNone(row['group_url'])
+
+    def test_cached_rows_skip_formatting(self):
+        """Для карточек из кеша дата и текст поста не нужны."""
+        caches['template_fragments'].clear()
+        posts = list(Post.objects.feed())
+        first = post_rows(posts)
+        for post in posts:
+            post.pub_date = None
+            post.text = None
+        self.assertEqual(post_rows(posts), first)
+
+    def test_card_matches_include(self):
+        """post_card выводит то же, что includes/post.html, и делит
+        с ним запись в кеше фрагментов."""
+        cache = caches['template_fragments']
+        cache.clear()
+        post = Post.objects.feed().get(pk=self.post.pk)
+        row, = post_rows([post])
+        card = post_card(row)
+        self.assertIn(cache.get(make_template_fragment_key(
+            'post_body', [post.pk, post.updated])), card)
+        included = Template("{% include 'includes/post.html' %}").render(
+            Context({'post': post}))
+        self.assertEqual(included.strip(), card.strip())
+        cache.clear()
+        included = Template("{% include 'includes/post.html' %}").render(
+            Context({'post': post}))
+        row, = post_rows([post])
+        self.assertEqual(included.strip(), post_card(row).strip())
+
+    def test_feed_links(self):
+        """Главная ведёт на группы, профиль - ещё и на страницы постов."""
+        client = Client()
+        client.force_login(self.user)
+        group_url = reverse('posts:group_list', args=(self.group.slug,))
+        detail_url = reverse('posts:post_detail', args=(self.post.pk,))
+        for url, links, missing in (
+            (reverse('posts:index'), [group_url], [detail_url]),
+            (group_url, [], [detail_url]),
+            (reverse('posts:profile', args=(self.user.username,)),
+             [group_url, detail_url], []),
+        ):
+            with self.subTest(url=url):
+                content = client.get(url).content.decode()
+                self.assertIn('Лев Толстой', content)
+                self.assertIn('Пост в группе', content)
+                for link in links:
+                    self.assertIn(f'href="{link}"', content)
+                for link in missing:
+                    self.assertNotIn(f'href="{link}"', content)
+
+
+class URLBuilderTest(TestCase):
+    # Значения аргументов: для каждого параметра берётся первое,
+    # которое принимает маршрут.
+    SAMPLES = (42, 'test-slug', 'posts', 'Лев Толстой', 'a/b')
+
+    def assert_same_as_reverse(self):
+        routes = get_routes()
+        self.assertTrue({
+            'posts:index', 'posts:group_list', 'posts:profile',
+            'posts:post_detail', 'posts:post_edit',
+        } <= set(routes))
+        for name, route in routes.items():
+            for sample in self.SAMPLES:
+                args = [sample] * len(route.params)
+                try:
+                    expected = reverse(name, args=args)
+                except NoReverseMatch:
+                    continue
+                with self.subTest(name=name, args=args):
+                    self.assertEqual(build_url(name, *args), expected)
+                    kwargs = dict(zip(route.params, args))
+                    self.assertEqual(build_url(name, **kwargs), expected)
+
+    def test_all_routes_match_reverse(self):
+        """Для всех маршрутов URL совпадают с reverse()."""
+        self.assert_same_as_reverse()
+
+    def test_script_prefix(self):
+        """Префикс приложения учитывается, как в reverse()."""
+        set_script_prefix('/ятуб/')
+        try:
+            self.assert_same_as_reverse()
+        finally:
+            set_script_prefix('/')
+
+    def test_invalid_arguments(self):
+        """Неподходящие аргументы и имена дают NoReverseMatch."""
+        for name, args in (
+            ('posts:post_detail', ['abc']),
+            ('posts:post_detail', []),
+            ('posts:group_list', ['a/b']),
+            ('posts:unknown', []),
+        ):
+            with self.subTest(name=name, args=args):
+                with self.assertRaises(NoReverseMatch):
+                    build_url(name, *args)
+
+    def test_template_tag(self):
+        """{% fast_url %} выводит то же, что {% url %}."""
+        context = Context({'pk': 5, 'slug': 'test-slug'})
+        self.assertEqual(
+            Template("{% load fast_url %}"
+                     "{% fast_url 'posts:post_detail' pk %} "
+                     "{% fast_url 'posts:group_list' slug=slug %}"
+                     ).render(context),
+            Template("{% url 'posts:post_detail' pk %} "
+                     "{% url 'posts:group_list' slug=slug %}"
+                     ).render(context))
+
+
+class StaticFilesTest(TestCase):
+    STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+        settings_override = override_settings(
+            STATIC_ROOT=self.root, STATICFILES_STORAGE=self.STORAGE,
+            STATIC_SERVE=True)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(self.root, 'staticfiles.json')) as file:
+            self.manifest = json.load(file)['paths']
+
+    def test_manifest_hashes_names(self):
+        """Манифест ведёт на копии с хешем содержимого в имени,
+        и {% static %} ссылается на них."""
+        for name in ('css/bootstrap.min.css', 'img/logo.png'):
+            with self.subTest(name=name):
+                hashed = self.manifest[name]
+                base, extension = os.path.splitext(name)
+                self.assertRegex(
+                    hashed, rf'^{base}\.[0-9a-f]{{12}}\{extension}$')
+                self.assertTrue(
+                    os.path.isfile(os.path.join(self.root, hashed)))
+        self.assertEqual(
+            Template("{% load static %}{% static 'css/bootstrap.min.css' %}")
+            .render(Context()),
+            settings.STATIC_URL + self.manifest['css/bootstrap.min.css'])
+
+    def test_compressed_copies(self):
+        """Текстовые файлы получают gzip-копию, картинки - нет."""
+        path = os.path.join(self.root, self.manifest['css/bootstrap.min.css'])
+        with open(path, 'rb') as original, \
+                gzip.open(path + '.gz', 'rb') as compressed:
+            self.assertEqual(compressed.read(), original.read())
+        self.assertFalse(os.path.exists(os.path.join(
+            self.root, self.manifest['img/logo.png'] + '.gz')))
+        self.assertEqual(compressed_path(path, 'gzip;q=0, deflate'),
+                         (path, None))
+
+    def test_serving(self):
+        """Файлы с хешем отдаются сжатыми и кешируются навсегда,
+        исходные имена - с перепроверкой."""
+        hashed = settings.STATIC_URL + self.manifest['css/bootstrap.min.css']
+        response = Client().get(hashed, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        body = gzip.decompress(b''.join(response.streaming_content))
+        self.assertTrue(body.startswith(b'@charset'))
+        last_modified = response['Last-Modified']
+        response.close()
+
+        response = Client().get(
+            settings.STATIC_URL + 'css/bootstrap.min.css')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        response.close()
+
+        response = Client().get(
+            hashed, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+        for path in ('css/missing.css', '../settings.py'):
+            with self.subTest(path=path):
+                response = Client().get(settings.STATIC_URL + path)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class CompressionMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        for i in range(10):
+            Post.objects.create(author=cls.user, text=f'Пост номер {i}')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_minify_html(self):
+        """Отступы, пустые строки и комментарии убираются, пробелы
+        внутри строк и содержимое pre и script остаются."""
+        html = ('<div>\n    <!-- комментарий -->\n\n    <p>a  b</p>\n'
+                '<!--[if IE]>ie<![endif]-->\n'
+                '<pre>\n  код\n</pre>\n<script>\n  x = 1;\n</script>'
+                '\n</div>\n')
+        self.assertEqual(
+            minify_html(html),
+            '<div>\n<p>a  b</p>\n<!--[if IE]>ie<![endif]-->\n'
+            '<pre>\n  код\n</pre>\n<script>\n  x = 1;\n</script>'
+            '\n</div>\n')
+
+    def test_gzip(self):
+        """Страница ленты сжимается gzip и остаётся той же страницей."""
+        plain = self.client.get(reverse('posts:index'))
+        response = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(response['Content-Length'],
+                         str(len(response.content)))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertLess(len(response.content), len(plain.content) / 3)
+
+    def test_minified_without_compression(self):
+        """Без Accept-Encoding ответ не сжат, но отступов в нём нет."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn('Content-Encoding', response)
+        content = response.content.decode()
+        self.assertIn('Пост номер 9', content)
+        self.assertNotIn('\n  ', content)
+        self.assertNotIn('<!--', content)
+
+    @override_settings(COMPRESSION_MIN_SIZE=10 ** 6, HTML_MINIFY=False)
+    def test_small_and_raw_responses(self):
+        """Ответы меньше порога не сжимаются, без HTML_MINIFY
+        разметка выводится как есть."""
+        response = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertIn('<!--', response.content.decode())
+
+    def test_cached_page_is_compressed_once(self):
+        """Страница из кеша страниц отдаётся сжатой и минифицированной
+        при сохранении в кеш, а не заново при каждом попадании."""
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+        guest = Client()
+        first = guest.get(reverse('posts:index'),
+                          HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(first['X-Page-Cache'], 'MISS')
+        with override_settings(HTML_MINIFY=False):
+            hit = guest.get(reverse('posts:index'),
+                            HTTP_ACCEPT_ENCODING='gzip')
+            plain = guest.get(reverse('posts:index'))
+        self.assertEqual(hit['X-Page-Cache'], 'HIT')
+        self.assertEqual(hit.content, first.content)
+        self.assertEqual(gzip.decompress(hit.content), plain.content)
+        self.assertNotIn('<!--', plain.content.decode())
+
+    def test_streaming_response_untouched(self):
+        """Потоковые ответы отдаются без изменений."""
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        middleware = CompressionMiddleware(
+            lambda request: StreamingHttpResponse(['  <p>\n'] * 1000))
+        response = middleware(request)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(b''.join(response.streaming_content),
+                         b'  <p>\n' * 1000)
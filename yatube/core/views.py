@@ -0,0 +1,14 @@
+from django.http import JsonResponse
+
+from .decorators import staff_required
+from .metrics import view_stats
+
+
+@staff_required
+def performance_stats(request):
+    """Отдаёт перцентили времени ответа, запросов к БД, отрисовки
+    шаблонов и размера ответа по именам URL."""
+    return JsonResponse(
+        {'views': view_stats.summary()},
+        json_dumps_params={'ensure_ascii': False}
+    )
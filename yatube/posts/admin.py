@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from .models import Post, Group
+from .search import search_posts
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -22,6 +23,12 @@ class PostAdmin(admin.ModelAdmin):
     # Отображаем текст -пусто-, если какое-то поле не заполнено
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        # Ищем через полнотекстовый индекс вместо LIKE '%...%'.
+        if not search_term:
+            return queryset, False
+        return queryset.filter(pk__in=search_posts(search_term)), False
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
@@ -0,0 +1,138 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+
+from .models import Post
+from .utils import CURSOR_PARAM, CursorPaginator
+from .views import (VIEW_ELEMENTS, group_feed_posts, index_posts,
+                    profile_feed_posts)
+
+# Поля поста в ответе API и пути к ним в запросе .values().
+API_FIELDS = {
+    'id': 'pk',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'updated': 'updated',
+    'author': 'author__username',
+    'author_name': None,
+    'group': 'group__slug',
+}
+# Имя автора собирается из двух колонок.
+AUTHOR_NAME_LOOKUPS = ('author__first_name', 'author__last_name')
+DEFAULT_FIELDS = ('id', 'text', 'pub_date', 'author', 'group')
+MAX_LIMIT = 100
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _requested_fields(request):
+    """Поля из параметра ?fields=id,text; без параметра - DEFAULT_FIELDS."""
+    fields = request.GET.get('fields')
+    if not fields:
+        return DEFAULT_FIELDS
+    fields = tuple(
+        field for field in (name.strip() for name in fields.split(','))
+        if field
+    )
+    unknown = set(fields) - set(API_FIELDS)
+    if unknown:
+        raise BadRequest(
+            'Неизвестные поля: {}'.format(', '.join(sorted(unknown))))
+    return fields
+
+
+def _lookups(fields):
+    """Колонки для .values(): запрошенные поля и ключ курсора."""
+    lookups = {'pk', 'pub_date'}
+    for field in fields:
+        if field == 'author_name':
+            lookups.update(AUTHOR_NAME_LOOKUPS)
+        else:
+            lookups.add(API_FIELDS[field])
+    return sorted(lookups)
+
+
+def _serialize(row, fields):
+    data = {}
+    for field in fields:
+        if field == 'author_name':
+            data[field] = ' '.join(
+                row[lookup] for lookup in AUTHOR_NAME_LOOKUPS
+                if row[lookup]
+            )
+        else:
+            data[field] = row[API_FIELDS[field]]
+    return data
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', VIEW_ELEMENTS))
+    except ValueError:
+        raise BadRequest('limit должен быть числом')
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+def _stream_page(page, fields):
+    """Отдаёт страницу кусками: словари из .values() кодируются
+    по одному, без создания экземпляров моделей."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    yield '{"results": ['
+    for number, row in enumerate(page):
+        if number:
+            yield ','
+        yield encoder.encode(_serialize(row, fields))
+    yield '], "next": {}, "previous": {}}}'.format(
+        json.dumps(page.next_cursor or None),
+        json.dumps(page.previous_cursor or None),
+    )
+
+
+def feed_response(request, post_list):
+    """Ответ списочного эндпоинта: страница ленты по курсору."""
+    try:
+        fields = _requested_fields(request)
+        limit = _limit(request)
+    except BadRequest as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    paginator = CursorPaginator(post_list.values(*_lookups(fields)), limit)
+    page = paginator.get_page(request.GET.get(CURSOR_PARAM))
+    return StreamingHttpResponse(
+        _stream_page(page, fields),
+        content_type='application/json; charset=utf-8'
+    )
+
+
+def index(request):
+    """Лента всех постов в JSON."""
+    return feed_response(request, index_posts())
+
+
+def group_posts(request, slug):
+    """Лента постов группы в JSON."""
+    _, post_list = group_feed_posts(slug)
+    return feed_response(request, post_list)
+
+
+def profile(request, username):
+    """Лента постов автора в JSON."""
+    _, post_list = profile_feed_posts(username)
+    return feed_response(request, post_list)
+
+
+def post_detail(request, post_id):
+    """Пост с указанным post_id в JSON."""
+    try:
+        fields = _requested_fields(request)
+    except BadRequest as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    row = Post.objects.filter(pk=post_id).values(*_lookups(fields)).first()
+    if row is None:
+        raise Http404('Пост не найден')
+    return JsonResponse(
+        _serialize(row, fields),
+        json_dumps_params={'ensure_ascii': False}
+    )
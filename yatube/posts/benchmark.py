@@ -0,0 +1,184 @@
+import datetime as dt
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import django
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.metrics import percentile
+
+from .cache import get_page_cache
+from .counters import rebuild_counters
+from .importer import insert_posts
+from .models import Group, Post, User
+from .search import get_backend
+from .timeline import reset_timelines
+from .versions import bump_all_versions
+
+PERCENTILES = (50, 90, 99)
+# Сценарии, которые пишут в БД.
+WRITE_SCENARIOS = ('post_create', 'post_edit')
+
+
+def generate_dataset(users=100, groups=10, posts=10000, seed=0):
+    """Создаёт пользователей, группы и посты для нагрузочных замеров.
+    Посты равномерно распределены по авторам, группам (часть без группы)
+    и датам за последний год."""
+    rng = random.Random(seed)
+    authors = [User(username=f'bench_user_{i}', first_name='Автор',
+                    last_name=str(i)) for i in range(users)]
+    for author in authors:
+        author.set_unusable_password()
+    User.objects.bulk_create(authors)
+    Group.objects.bulk_create(
+        Group(title=f'Группа {i}', slug=f'bench-group-{i}',
+              description=f'Описание группы {i}')
+        for i in range(groups)
+    )
+    author_ids = list(User.objects.filter(
+        username__startswith='bench_user_').values_list('pk', flat=True))
+    group_ids = list(Group.objects.filter(
+        slug__startswith='bench-group-').values_list('pk', flat=True))
+    group_ids.append(None)
+    now = timezone.now()
+    batch = []
+    for i in range(posts):
+        batch.append(Post(
+            text=f'Тестовый пост номер {i} ' * rng.randint(1, 20),
+            author_id=rng.choice(author_ids),
+            group_id=rng.choice(group_ids),
+            pub_date=now - dt.timedelta(seconds=rng.randint(0, 31536000)),
+            updated=now,
+        ))
+        if len(batch) == 5000:
+            insert_posts(batch)
+            batch = []
+    insert_posts(batch)
+    rebuild_counters()
+    get_backend().rebuild()
+    get_page_cache().clear()
+    reset_timelines()
+    bump_all_versions()
+
+
+@contextmanager
+def benchmark_database(name=None, **dataset):
+    """Создаёт временную тестовую БД с данными generate_dataset(**dataset)
+    и удаляет её после замеров. name - имя тестовой БД, для SQLite
+    по умолчанию БД в памяти."""
+    old_name = connection.settings_dict['NAME']
+    test_settings = connection.settings_dict['TEST']
+    old_test_name = test_settings.get('NAME')
+    if name is not None:
+        test_settings['NAME'] = name
+    connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False)
+    try:
+        for cache in caches.all():
+            cache.clear()
+        generate_dataset(**dataset)
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        test_settings['NAME'] = old_test_name
+
+
+def measure(name, request, repeat):
+    """Выполняет request() repeat раз и возвращает задержки в мс
+    и число запросов к БД. Пиковая память замеряется отдельным
+    запросом: tracemalloc заметно замедляет выполнение."""
+    latencies = []
+    queries = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = request()
+            latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(len(captured))
+        if response.status_code >= 400:
+            raise RuntimeError(f'{name}: ответ {response.status_code}')
+    tracemalloc.start()
+    try:
+        request()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    result = {
+        'requests': repeat,
+        'mean_ms': round(statistics.mean(latencies), 3),
+        'queries_max': max(queries),
+        'queries_mean': round(statistics.mean(queries), 2),
+        'peak_memory_kb': round(peak_memory / 1024, 1),
+    }
+    for percent in PERCENTILES:
+        result[f'p{percent}_ms'] = round(percentile(latencies, percent), 3)
+    return result
+
+
+def scenarios():
+    """Замеряемые запросы: имя -> функция без аргументов.
+    Лента и пост открываются авторизованным пользователем, чтобы
+    замерять отрисовку, а не кеш страниц для гостей."""
+    author = User.objects.filter(posts__isnull=False).first()
+    group = Group.objects.filter(posts__isnull=False).first()
+    post = author.posts.first()
+    client = Client()
+    client.force_login(author)
+    guest = Client()
+    pages = max(1, author.posts.count() // 10)
+    counter = iter(range(10 ** 9))
+    return {
+        'index': lambda: client.get(reverse('posts:index')),
+        'index_deep_page': lambda: client.get(
+            reverse('posts:index'), {'page': 10 ** 6}),
+        'index_anonymous': lambda: guest.get(reverse('posts:index')),
+        'group_posts': lambda: client.get(
+            reverse('posts:group_list', args=(group.slug,))),
+        'profile': lambda: client.get(
+            reverse('posts:profile', args=(author.username,)),
+            {'page': pages}),
+        'post_detail': lambda: client.get(
+            reverse('posts:post_detail', args=(post.pk,))),
+        'post_create': lambda: client.post(
+            reverse('posts:post_create'),
+            {'text': f'Новый пост {next(counter)}', 'group': group.pk}),
+        'post_edit': lambda: client.post(
+            reverse('posts:post_edit', args=(post.pk,)),
+            {'text': f'Правка {next(counter)}', 'group': group.pk}),
+    }
+
+
+def run_benchmark(repeat=50, only=None, read_only=False):
+    """Замеряет сценарии на данных в текущей БД и возвращает отчёт.
+    С read_only сценарии из WRITE_SCENARIOS пропускаются."""
+    report = {
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+        },
+        'dataset': {
+            'users': User.objects.count(),
+            'groups': Group.objects.count(),
+            'posts': Post.objects.count(),
+        },
+        'results': {},
+    }
+    for name, request in scenarios().items():
+        if only and name not in only:
+            continue
+        if read_only and name in WRITE_SCENARIOS:
+            continue
+        # Первый запрос прогревает шаблоны и кеши.
+        request()
+        report['results'][name] = measure(name, request, repeat)
+    return report
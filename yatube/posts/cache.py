@@ -0,0 +1,88 @@
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+
+from core.compression import precompress
+
+from .utils import CURSOR_PARAM
+from .versions import feed_version
+
+HITS_KEY = 'page_cache:hits'
+MISSES_KEY = 'page_cache:misses'
+
+# Имена лент, страницы которых кешируются и сбрасываются вместе.
+INDEX_FEED = 'index'
+GROUP_FEED = 'group:{slug}'
+PROFILE_FEED = 'profile:{username}'
+
+
+def get_page_cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def _increment(key):
+    cache = get_page_cache()
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Ключ успел вытесниться между add() и incr().
+        cache.set(key, 1, None)
+
+
+def page_cache_stats():
+    """Возвращает счётчики попаданий и промахов кеша страниц."""
+    cache = get_page_cache()
+    stats = cache.get_many((HITS_KEY, MISSES_KEY))
+    hits = stats.get(HITS_KEY, 0)
+    misses = stats.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+def cache_anonymous_page(feed):
+    """Кеширует страницы ленты для неавторизованных пользователей.
+    feed - шаблон имени ленты, который заполняется аргументами
+    представления, например GROUP_FEED.
+    Ключ страницы складывается из ленты, её версии в БД, номера
+    страницы и курсора. Версию повышает любая запись в ленту в любом
+    процессе, и страница старой версии больше не находится; ETag
+    этого же запроса строится из той же версии."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (request.method not in ('GET', 'HEAD')
+                    or request.user.is_authenticated):
+                return view(request, *args, **kwargs)
+            cache = get_page_cache()
+            feed_name = feed.format(**kwargs)
+            # Пустой курсор тоже включает режим курсоров, поэтому
+            # отличается от его отсутствия.
+            cursor = request.GET.get(CURSOR_PARAM)
+            key = 'page_cache:{}:{}.{}:{}:{}'.format(
+                feed_name,
+                *feed_version(request, feed_name),
+                request.GET.get('page', ''),
+                '-' if cursor is None else 'c:' + cursor,
+            )
+            response = cache.get(key)
+            if response is not None:
+                _increment(HITS_KEY)
+                response['X-Page-Cache'] = 'HIT'
+                return response
+            _increment(MISSES_KEY)
+            response = view(request, *args, **kwargs)
+            patch_vary_headers(response, ('Cookie',))
+            if response.status_code == 200 and not response.cookies:
+                precompress(response)
+                cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+            response['X-Page-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
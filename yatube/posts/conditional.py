@@ -0,0 +1,49 @@
+import hashlib
+
+from .cache import GROUP_FEED, INDEX_FEED, PROFILE_FEED
+from .models import Post
+from .versions import feed_version, get_versions
+
+
+def _etag(request, *versions):
+    # Страница зависит от адреса (включая номер страницы и курсор)
+    # и от пользователя: в шапке выводится его имя.
+    user = request.user.pk if request.user.is_authenticated else ''
+    raw = '|'.join(str(part) for part in (
+        request.get_full_path(), user, *versions
+    ))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+# ETag лент строится по версии ленты из posts.versions: она меняется
+# с каждым новым, изменённым, удалённым и перенесённым постом и правкой
+# группы или автора, а читается одним запросом по первичному ключу.
+# Last-Modified не отдаётся: дата последнего изменения постов ленты
+# не меняется, когда пост удаляют или переносят в другую группу.
+def index_etag(request):
+    return _etag(request, feed_version(request, INDEX_FEED))
+
+
+def group_etag(request, slug):
+    return _etag(request, feed_version(request, GROUP_FEED.format(slug=slug)))
+
+
+def profile_etag(request, username):
+    return _etag(
+        request, feed_version(request, PROFILE_FEED.format(username=username)))
+
+
+def post_etag(request, post_id):
+    """Пост зависит от своей даты изменения, автора (имя и число постов
+    входят в версию его профайла) и группы."""
+    post = Post.objects.filter(pk=post_id).values(
+        'updated', 'author__username', 'group__slug'
+    ).first()
+    if post is None:
+        return None
+    feeds = [PROFILE_FEED.format(username=post['author__username'])]
+    if post['group__slug'] is not None:
+        feeds.append(GROUP_FEED.format(slug=post['group__slug']))
+    versions = get_versions(*feeds)
+    return _etag(request, post['updated'],
+                 *(versions[feed] for feed in feeds))
@@ -0,0 +1,104 @@
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, When
+
+from .models import AuthorCounter, Group, Post
+
+
+def change_author_count(author_id, delta):
+    """Изменяет счётчик постов автора на delta."""
+    if delta > 0:
+        _add_author_count(author_id, delta)
+        return
+    AuthorCounter.objects.filter(
+        author_id=author_id, posts_count__gte=-delta
+    ).update(
+        posts_count=F('posts_count') + delta
+    )
+
+
+def _add_author_count(author_id, delta):
+    """Увеличивает счётчик одним запросом (INSERT ... ON CONFLICT есть
+    в SQLite и PostgreSQL). Счётчик, которого ещё нет, заводится
+    по фактическому числу постов автора: первый пост нового автора
+    стоит столько же запросов, сколько любой другой."""
+    counters = AuthorCounter._meta.db_table
+    posts = Post._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {counters} (author_id, posts_count) '
+            f'SELECT %s, COUNT(*) FROM {posts} WHERE author_id = %s '
+            f'ON CONFLICT (author_id) DO UPDATE '
+            f'SET posts_count = {counters}.posts_count + %s',
+            [author_id, author_id, delta]
+        )
+
+
+def change_group_count(group_id, delta):
+    """Изменяет счётчик постов группы на delta."""
+    if group_id is None:
+        return
+    groups = Group.objects.filter(pk=group_id)
+    if delta < 0:
+        groups = groups.filter(posts_count__gte=-delta)
+    groups.update(
+        posts_count=F('posts_count') + delta
+    )
+
+
+def move_group_count(from_group_id, to_group_id):
+    """Переносит пост между группами: счётчики обеих групп
+    меняются одним запросом."""
+    if from_group_id is None or to_group_id is None:
+        change_group_count(from_group_id, -1)
+        change_group_count(to_group_id, 1)
+        return
+    Group.objects.filter(pk__in=(from_group_id, to_group_id)).update(
+        posts_count=Case(
+            When(pk=from_group_id, posts_count__gte=1,
+                 then=F('posts_count') - 1),
+            When(pk=to_group_id, then=F('posts_count') + 1),
+            default=F('posts_count'),
+        )
+    )
+
+
+def get_author_posts_count(author):
+    """Возвращает количество постов автора из счётчика.
+    Чтение не пишет в БД: счётчик, которого ещё нет, заводится, только
+    если у автора есть посты (без них счётчик не нужен)."""
+    posts_count = AuthorCounter.objects.filter(
+        author=author
+    ).values_list('posts_count', flat=True).first()
+    if posts_count is None:
+        posts_count = author.posts.count()
+        if posts_count:
+            AuthorCounter.objects.get_or_create(
+                author=author,
+                defaults={'posts_count': posts_count}
+            )
+    return posts_count
+
+
+@transaction.atomic
+def rebuild_counters():
+    """Пересчитывает счётчики постов всех авторов и групп.
+    Возвращает количество пересчитанных авторов и групп."""
+    AuthorCounter.objects.all().delete()
+    author_counts = (
+        Post.objects.order_by().values('author_id')
+        .annotate(posts_count=Count('pk'))
+    )
+    AuthorCounter.objects.bulk_create(
+        AuthorCounter(author_id=row['author_id'],
+                      posts_count=row['posts_count'])
+        for row in author_counts
+    )
+    group_counts = dict(
+        Post.objects.order_by().filter(group__isnull=False)
+        .values_list('group_id').annotate(Count('pk'))
+    )
+    groups = list(Group.objects.only('pk', 'posts_count'))
+    for group in groups:
+        group.posts_count = group_counts.get(group.pk, 0)
+    Group.objects.bulk_update(groups, ['posts_count'])
+    return len(author_counts), len(groups)
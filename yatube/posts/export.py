@@ -0,0 +1,93 @@
+import csv
+import datetime as dt
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Post
+
+FORMATS = ('ndjson', 'csv')
+# Колонки выгрузки и пути к ним в запросе .values().
+EXPORT_FIELDS = {
+    'id': 'pk',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'updated': 'updated',
+    'author': 'author__username',
+    'group': 'group__slug',
+}
+BATCH_SIZE = 2000
+
+
+def parse_moment(value):
+    """Разбирает дату или дату со временем в формате ISO 8601.
+    Возвращает None для пустого значения и ValueError для неверного."""
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Неверная дата: {value}')
+        moment = dt.datetime.combine(day, dt.time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def iter_posts(group=None, author=None, since=None, until=None,
+               batch_size=BATCH_SIZE):
+    """Перебирает посты словарями пачками по batch_size строк.
+    Пачки выбираются по ключу id > последний_id, поэтому в памяти
+    одновременно находится не больше одной пачки при любом размере
+    таблицы, а стоимость очередной пачки не растёт."""
+    posts = Post.objects.all()
+    if group:
+        posts = posts.filter(group__slug=group)
+    if author:
+        posts = posts.filter(author__username=author)
+    if since:
+        posts = posts.filter(pub_date__gte=since)
+    if until:
+        posts = posts.filter(pub_date__lt=until)
+    posts = posts.order_by('pk').values(*EXPORT_FIELDS.values())
+    last_pk = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return
+        for row in batch:
+            yield {field: row[lookup]
+                   for field, lookup in EXPORT_FIELDS.items()}
+        last_pk = batch[-1]['pk']
+
+
+def ndjson_lines(rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(row) + '\n'
+
+
+class _Echo:
+    """Псевдофайл для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(
+            value.isoformat() if isinstance(value, dt.datetime) else value
+            for value in row.values()
+        )
+
+
+def export_lines(format, rows):
+    """Строки выгрузки в формате ndjson или csv."""
+    if format == 'csv':
+        return csv_lines(rows)
+    return ndjson_lines(rows)
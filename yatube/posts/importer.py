@@ -0,0 +1,147 @@
+import csv
+import json
+from itertools import islice
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from .export import parse_moment
+from .models import Group, Post, User
+
+BATCH_SIZE = 5000
+
+
+def read_ndjson(lines):
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def read_csv(lines):
+    yield from csv.DictReader(lines)
+
+
+def read_rows(lines, format):
+    """Построчно читает строки выгрузки (формат как у export_posts)."""
+    if format == 'csv':
+        return read_csv(lines)
+    return read_ndjson(lines)
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def insert_posts(posts):
+    """Вставляет посты пачками, как bulk_create, но в режиме raw,
+    как loaddata: pre_save полей не вызывается, и pub_date и updated
+    сохраняются такими, какими их заполнили. auto_now_add общего поля
+    модели не меняется, поэтому параллельные сохранения постов
+    получают дату публикации как обычно."""
+    if not posts:
+        return
+    fields = [field for field in Post._meta.concrete_fields
+              if not field.primary_key]
+    connection = connections[router.db_for_write(Post)]
+    size = connection.ops.bulk_batch_size(fields, posts) or len(posts)
+    for start in range(0, len(posts), size):
+        Post.objects._insert(
+            posts[start:start + size], fields=fields, raw=True)
+
+
+class LookupCache:
+    """Кеш id авторов и групп по username и slug.
+    Неизвестные ключи догружаются одним запросом на пачку."""
+
+    def __init__(self, create_authors=False, create_groups=False):
+        self.authors = {}
+        self.groups = {}
+        self.create_authors = create_authors
+        self.create_groups = create_groups
+
+    def load(self, batch):
+        usernames = {row['author'] for row in batch} - set(self.authors)
+        if usernames:
+            self.authors.update(
+                User.objects.filter(username__in=usernames)
+                .values_list('username', 'pk')
+            )
+            missing = usernames - set(self.authors)
+            if missing and self.create_authors:
+                users = [User(username=username) for username in missing]
+                for user in users:
+                    user.set_unusable_password()
+                User.objects.bulk_create(users)
+                self.authors.update(
+                    User.objects.filter(username__in=missing)
+                    .values_list('username', 'pk')
+                )
+        slugs = {row['group'] for row in batch if row.get('group')}
+        slugs -= set(self.groups)
+        if slugs:
+            self.groups.update(
+                Group.objects.filter(slug__in=slugs).values_list('slug', 'pk')
+            )
+            missing = slugs - set(self.groups)
+            if missing and self.create_groups:
+                Group.objects.bulk_create(
+                    Group(title=slug, slug=slug, description='')
+                    for slug in missing
+                )
+                self.groups.update(
+                    Group.objects.filter(slug__in=missing)
+                    .values_list('slug', 'pk')
+                )
+
+
+def build_posts(batch, lookups):
+    """Строит несохранённые посты из строк пачки.
+    Возвращает посты и количество пропущенных строк
+    (пустой текст, неизвестный автор или группа). Дата изменения
+    поста - момент загрузки."""
+    posts = []
+    skipped = 0
+    now = timezone.now()
+    for row in batch:
+        text = row['text']
+        author_id = lookups.authors.get(row['author'])
+        group_slug = row.get('group') or None
+        group_id = lookups.groups.get(group_slug) if group_slug else None
+        if (not isinstance(text, str) or not text.strip()
+                or author_id is None or (group_slug and group_id is None)):
+            skipped += 1
+            continue
+        post = Post(text=text, author_id=author_id, group_id=group_id,
+                    updated=now)
+        post.pub_date = parse_moment(row.get('pub_date')) or now
+        posts.append(post)
+    return posts, skipped
+
+
+def import_posts(rows, batch_size=BATCH_SIZE, create_authors=False,
+                 create_groups=False, on_batch=None):
+    """Загружает посты пачками: insert_posts в отдельной транзакции
+    на каждую пачку. Строки NDJSON, которые не являются объектами,
+    пропускаются. on_batch(imported, skipped) вызывается после пачки.
+    Сигналы модели не срабатывают: счётчики, поисковый индекс и кеш
+    страниц нужно обновить после загрузки.
+    Возвращает количество загруженных и пропущенных строк."""
+    lookups = LookupCache(create_authors, create_groups)
+    imported = skipped = 0
+    for batch in batches(rows, batch_size):
+        objects = [row for row in batch if isinstance(row, dict)]
+        with transaction.atomic():
+            lookups.load(objects)
+            posts, batch_skipped = build_posts(objects, lookups)
+            insert_posts(posts)
+        imported += len(posts)
+        skipped += batch_skipped + len(batch) - len(objects)
+        if on_batch is not None:
+            on_batch(imported, skipped)
+    return imported, skipped
@@ -0,0 +1,57 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.benchmark import WRITE_SCENARIOS, benchmark_database, run_benchmark
+
+
+class Command(BaseCommand):
+    help = ('Генерирует данные во временной тестовой БД и замеряет '
+            'задержки, число запросов и пиковую память страниц ленты. '
+            'Пишет отчёт в JSON для сравнения между коммитами.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--requests', type=int, default=50,
+                            help='Запросов на сценарий')
+        parser.add_argument('--only', nargs='+', metavar='SCENARIO',
+                            help='Замерить только эти сценарии')
+        parser.add_argument('--output', help='Файл; по умолчанию stdout')
+        parser.add_argument('--existing-db', action='store_true',
+                            help='Замерять на данных текущей БД '
+                                 'без генерации, только чтение')
+        parser.add_argument('--allow-writes', action='store_true',
+                            help='С --existing-db замерять и сценарии, '
+                                 'которые создают и правят посты в БД')
+
+    def handle(self, *args, **options):
+        if options['existing_db']:
+            read_only = not options['allow_writes']
+            writes = set(options['only'] or ()) & set(WRITE_SCENARIOS)
+            if read_only and writes:
+                raise CommandError(
+                    'Сценарии {} пишут в текущую БД: добавьте '
+                    '--allow-writes'.format(', '.join(sorted(writes))))
+            report = run_benchmark(
+                options['requests'], options['only'], read_only=read_only)
+        else:
+            report = self.run_in_test_db(options)
+        output = json.dumps(report, ensure_ascii=False, indent=2,
+                            sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def run_in_test_db(self, options):
+        with benchmark_database(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            seed=options['seed'],
+        ):
+            return run_benchmark(options['requests'], options['only'])
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import (BATCH_SIZE, FORMATS, export_lines, iter_posts,
+                          parse_moment)
+
+
+class Command(BaseCommand):
+    help = ('Выгружает посты с автором и группой в NDJSON или CSV. '
+            'Память не зависит от размера таблицы.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument('--output', help='Файл; по умолчанию stdout')
+        parser.add_argument('--group', help='slug группы')
+        parser.add_argument('--author', help='username автора')
+        parser.add_argument('--since', help='Дата публикации от (ISO 8601)')
+        parser.add_argument('--until', help='Дата публикации до (ISO 8601)')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            since = parse_moment(options['since'])
+            until = parse_moment(options['until'])
+        except ValueError as error:
+            raise CommandError(error)
+        rows = iter_posts(
+            group=options['group'],
+            author=options['author'],
+            since=since,
+            until=until,
+            batch_size=options['batch_size'],
+        )
+        lines = export_lines(options['format'], rows)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8',
+                      newline='') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
@@ -0,0 +1,71 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.cache import get_page_cache
+from posts.counters import rebuild_counters
+from posts.export import FORMATS
+from posts.importer import BATCH_SIZE, import_posts, read_rows
+from posts.search import get_backend
+from posts.timeline import reset_timelines
+from posts.versions import bump_all_versions
+
+
+class Command(BaseCommand):
+    help = ('Загружает посты из NDJSON или CSV (формат export_posts) '
+            'пачками через bulk_create.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с постами')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='По умолчанию определяется по расширению файла')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--create-authors', action='store_true',
+            help='Создавать отсутствующих авторов')
+        parser.add_argument(
+            '--create-groups', action='store_true',
+            help='Создавать отсутствующие группы')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'Файл не найден: {path}')
+        export_format = options['format'] or (
+            'csv' if path.endswith('.csv') else 'ndjson')
+        started = time.monotonic()
+
+        def report(imported, skipped):
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'Загружено: {imported}, пропущено: {skipped}, '
+                f'{imported / elapsed:.0f} строк/с'
+            )
+
+        try:
+            with open(path, encoding='utf-8', newline='') as lines:
+                imported, skipped = import_posts(
+                    read_rows(lines, export_format),
+                    batch_size=options['batch_size'],
+                    create_authors=options['create_authors'],
+                    create_groups=options['create_groups'],
+                    on_batch=report,
+                )
+            elapsed = time.monotonic() - started
+        except (KeyError, ValueError) as error:
+            raise CommandError(f'Неверная строка в файле: {error}')
+        finally:
+            # Вставка пачками не отправляет сигналы: обновляем производные
+            # данные. Пачки до неверной строки уже сохранены, поэтому
+            # и после ошибки тоже.
+            rebuild_counters()
+            get_backend().rebuild()
+            get_page_cache().clear()
+            reset_timelines()
+            bump_all_versions()
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: загружено {imported}, пропущено {skipped} '
+            f'за {elapsed:.1f} с ({imported / (elapsed or 1):.0f} строк/с)'
+        ))
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_counters(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Group = apps.get_model('posts', 'Group')
+    AuthorCounter = apps.get_model('posts', 'AuthorCounter')
+    author_counts = (
+        Post.objects.order_by().values('author_id')
+        .annotate(posts_count=Count('pk'))
+    )
+    AuthorCounter.objects.bulk_create(
+        AuthorCounter(author_id=row['author_id'],
+                      posts_count=row['posts_count'])
+        for row in author_counts
+    )
+    group_counts = (
+        Post.objects.order_by().filter(group__isnull=False)
+        .values('group_id').annotate(posts_count=Count('pk'))
+    )
+    for row in group_counts:
+        Group.objects.filter(pk=row['group_id']).update(
+            posts_count=row['posts_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0004_auto_20221204_1723'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество постов'),
+        ),
+        migrations.CreateModel(
+            name='AuthorCounter',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='post_counter', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Количество постов')),
+            ],
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+import re
+
+from django.db import migrations
+from django.db.utils import OperationalError
+
+FTS_TABLE = 'posts_post_fts'
+
+# Копия токенизатора из posts.search на момент миграции: правки
+# в живом модуле не должны менять то, что записывает эта миграция.
+WORD = re.compile(r'\w+')
+REFLEXIVE_ENDINGS = ('ся', 'сь')
+ENDINGS = sorted((
+    'иями', 'ями', 'ами', 'иях', 'ией', 'иям', 'ием', 'ого', 'его', 'ому',
+    'ему', 'ыми', 'ими', 'ешь', 'ете', 'ите', 'ать', 'ять', 'ить', 'еть',
+    'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ый', 'ий', 'ой', 'ей', 'ом', 'ем',
+    'ам', 'ям', 'ах', 'ях', 'ую', 'юю', 'ов', 'ев', 'ет', 'ют', 'ут', 'ит',
+    'ат', 'ят', 'ть', 'ия', 'ья', 'ью', 'а', 'я', 'о', 'е', 'ы', 'и', 'у',
+    'ю', 'ь', 'й',
+), key=len, reverse=True)
+MIN_STEM = 3
+
+
+def stem(word):
+    for ending in REFLEXIVE_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            word = word[:-len(ending)]
+            break
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def tokenize(text):
+    words = WORD.findall(text.lower().replace('ё', 'е'))
+    return [stem(word) for word in words]
+
+
+def create_fts_table(apps, schema_editor):
+    # Полнотекстовый индекс доступен только в SQLite, собранной с FTS5.
+    # Иначе поиск работает через обратный индекс в памяти.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Post = apps.get_model('posts', 'Post')
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+                "body, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+        except OperationalError:
+            return
+        for post_id, text in Post.objects.values_list('pk', 'text'):
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, body) VALUES (%s, %s)',
+                [post_id, ' '.join(tokenize(text))]
+            )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_post_updated'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_post_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedVersion',
+            fields=[
+                ('feed', models.CharField(max_length=200, primary_key=True, serialize=False, verbose_name='Лента')),
+                ('version', models.PositiveIntegerField(default=0, verbose_name='Версия')),
+            ],
+        ),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -12,11 +12,32 @@ class Group(models.Model):
         verbose_name='Идентификатор'
     )
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(
+        'Количество постов',
+        default=0,
+        editable=False
+    )
 
     def __str__(self) -> str:
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    def feed(self):
+        """Посты для ленты: автор и группа подгружаются тем же запросом,
+        неиспользуемые в шаблонах колонки не выбираются."""
+        return self.select_related('author', 'group').only(
+            'text',
+            'pub_date',
+            'updated',
+            'author__username',
+            'author__first_name',
+            'author__last_name',
+            'group__slug',
+            'group__title',
+        )
+
+
 class Post(models.Model):
     text = models.TextField(
         'Текст поста',
@@ -26,6 +47,12 @@ class Post(models.Model):
         'Дата публикации',
         auto_now_add=True
     )
+    # Меняется при каждом сохранении поста (форма, админка)
+    # и служит версией закешированной карточки поста.
+    updated = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -42,8 +69,67 @@ class Post(models.Model):
         help_text='Группа, к которой будет относиться пост'
     )
 
+    objects = PostQuerySet.as_manager()
+
     def __str__(self) -> str:
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        # Счётчики постов обновляются в обработчиках сигналов
+        # в той же транзакции, что и сам пост.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-pub_date']
+        # Индексы под сортировку лент: общей, группы и автора.
+        indexes = [
+            models.Index(
+                fields=['pub_date'],
+                name='posts_post_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', 'pub_date'],
+                name='posts_post_author_date_idx'
+            ),
+            models.Index(
+                fields=['group', 'pub_date'],
+                name='posts_post_group_date_idx'
+            ),
+        ]
+
+
+class AuthorCounter(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='post_counter',
+        verbose_name='Автор'
+    )
+    posts_count = models.PositiveIntegerField(
+        'Количество постов',
+        default=0
+    )
+
+    def __str__(self) -> str:
+        return f'{self.author_id}: {self.posts_count}'
+
+
+class FeedVersion(models.Model):
+    """Версия ленты posts.cache ('index', 'group:<slug>',
+    'profile:<username>'). Растёт при каждом изменении, которое видно
+    в ленте: новом, изменённом, удалённом или перенесённом посте,
+    правке группы или автора. Строки нет, пока лента не менялась."""
+    feed = models.CharField(
+        'Лента',
+        max_length=200,
+        primary_key=True
+    )
+    version = models.PositiveIntegerField(
+        'Версия',
+        default=0
+    )
+
+    def __str__(self) -> str:
+        return f'{self.feed}: {self.version}'
@@ -0,0 +1,224 @@
+import math
+import re
+from bisect import bisect_left, insort
+import threading
+from collections import Counter, defaultdict
+from itertools import islice
+
+from django.db import connection, transaction
+from django.db.utils import DatabaseError
+
+from .models import Post
+
+FTS_TABLE = 'posts_post_fts'
+# Сколько найденных постов отдавать в выдачу.
+SEARCH_LIMIT = 1000
+REBUILD_BATCH_SIZE = 5000
+
+WORD = re.compile(r'\w+')
+# Окончания русских слов от длинных к коротким. Отбрасывается одно,
+# если после этого от слова остаётся не меньше MIN_STEM букв.
+REFLEXIVE_ENDINGS = ('ся', 'сь')
+ENDINGS = sorted((
+    'иями', 'ями', 'ами', 'иях', 'ией', 'иям', 'ием', 'ого', 'его', 'ому',
+    'ему', 'ыми', 'ими', 'ешь', 'ете', 'ите', 'ать', 'ять', 'ить', 'еть',
+    'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ый', 'ий', 'ой', 'ей', 'ом', 'ем',
+    'ам', 'ям', 'ах', 'ях', 'ую', 'юю', 'ов', 'ев', 'ет', 'ют', 'ут', 'ит',
+    'ат', 'ят', 'ть', 'ия', 'ья', 'ью', 'а', 'я', 'о', 'е', 'ы', 'и', 'у',
+    'ю', 'ь', 'й',
+), key=len, reverse=True)
+MIN_STEM = 3
+
+
+def stem(word):
+    """Отбрасывает у слова возвратную частицу и падежное
+    или глагольное окончание."""
+    for ending in REFLEXIVE_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            word = word[:-len(ending)]
+            break
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def tokenize(text):
+    """Разбивает текст на основы слов в нижнем регистре."""
+    words = WORD.findall(text.lower().replace('ё', 'е'))
+    return [stem(word) for word in words]
+
+
+class FTS5Backend:
+    """Поиск по виртуальной таблице SQLite FTS5.
+    В таблицу пишутся основы слов, поэтому разные формы
+    одного слова находят друг друга."""
+
+    def index(self, post_id, text):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT OR REPLACE INTO {FTS_TABLE} (rowid, body) '
+                'VALUES (%s, %s)',
+                [post_id, ' '.join(tokenize(text))]
+            )
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        # Каждая основа ищется как префикс: "пост"* найдёт и "постам".
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                'ORDER BY rank LIMIT %s',
+                [match, limit]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    @transaction.atomic
+    def rebuild(self):
+        posts = Post.objects.values_list('pk', 'text').iterator()
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            while True:
+                batch = list(islice(posts, REBUILD_BATCH_SIZE))
+                if not batch:
+                    break
+                cursor.executemany(
+                    f'INSERT INTO {FTS_TABLE} (rowid, body) '
+                    'VALUES (%s, %s)',
+                    [(post_id, ' '.join(tokenize(text)))
+                     for post_id, text in batch]
+                )
+
+
+class InvertedIndexBackend:
+    """Обратный индекс в памяти процесса для баз без FTS5.
+    Строится из БД при первом поиске и поддерживается сигналами."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = None
+        # post_id -> (количество слов, множество основ).
+        self._documents = None
+        # Основы по алфавиту: слова с общим префиксом идут подряд.
+        self._terms = None
+
+    def _ensure_built(self):
+        if self._postings is None:
+            self.rebuild()
+
+    def rebuild(self):
+        with self._lock:
+            self._postings = defaultdict(dict)
+            self._documents = {}
+            self._terms = []
+            for post_id, text in (
+                    Post.objects.values_list('pk', 'text').iterator()):
+                self._add(post_id, text, sort=False)
+            self._terms.sort()
+
+    def _add(self, post_id, text, sort=True):
+        frequencies = Counter(tokenize(text))
+        self._documents[post_id] = (
+            sum(frequencies.values()), set(frequencies))
+        for token, frequency in frequencies.items():
+            if token not in self._postings:
+                if sort:
+                    insort(self._terms, token)
+                else:
+                    self._terms.append(token)
+            self._postings[token][post_id] = frequency
+
+    def index(self, post_id, text):
+        with self._lock:
+            if self._postings is None:
+                return
+            self._discard(post_id)
+            self._add(post_id, text)
+
+    def remove(self, post_id):
+        with self._lock:
+            if self._postings is not None:
+                self._discard(post_id)
+
+    def _discard(self, post_id):
+        _, tokens = self._documents.pop(post_id, (0, ()))
+        for token in tokens:
+            posting = self._postings[token]
+            posting.pop(post_id, None)
+            if not posting:
+                del self._postings[token]
+                del self._terms[bisect_left(self._terms, token)]
+
+    def _prefixed(self, prefix):
+        """Основы, начинающиеся с prefix: двоичный поиск по алфавиту
+        вместо обхода всего словаря."""
+        index = bisect_left(self._terms, prefix)
+        while (index < len(self._terms)
+               and self._terms[index].startswith(prefix)):
+            yield self._terms[index]
+            index += 1
+
+    def search(self, query, limit=SEARCH_LIMIT):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        with self._lock:
+            self._ensure_built()
+            documents = len(self._documents) or 1
+            scores = None
+            for token in tokens:
+                # Основа из запроса ищется как префикс, как и в FTS5.
+                token_scores = defaultdict(float)
+                for word in self._prefixed(token):
+                    posting = self._postings[word]
+                    idf = math.log(1 + documents / len(posting))
+                    for post_id, frequency in posting.items():
+                        length, _ = self._documents[post_id]
+                        token_scores[post_id] += frequency / length * idf
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {
+                        post_id: score + token_scores[post_id]
+                        for post_id, score in scores.items()
+                        if post_id in token_scores
+                    }
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return [post_id for post_id, _ in ranked[:limit]]
+
+
+_backend = None
+
+
+def fts5_table_exists():
+    if connection.vendor != 'sqlite':
+        return False
+    try:
+        return FTS_TABLE in connection.introspection.table_names()
+    except DatabaseError:
+        return False
+
+
+def get_backend():
+    """Возвращает поисковый движок: FTS5, если таблица для него создана
+    миграцией, иначе обратный индекс в памяти."""
+    global _backend
+    if _backend is None:
+        if fts5_table_exists():
+            _backend = FTS5Backend()
+        else:
+            _backend = InvertedIndexBackend()
+    return _backend
+
+
+def search_posts(query, limit=SEARCH_LIMIT):
+    """Возвращает id постов, подходящих под запрос, от лучших к худшим."""
+    return get_backend().search(query, limit)
@@ -0,0 +1,193 @@
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from .cache import GROUP_FEED, INDEX_FEED, PROFILE_FEED
+from .counters import (change_author_count, change_group_count,
+                       move_group_count)
+from .models import Group, Post, User
+from .search import get_backend
+from .versions import bump_versions
+from .timeline import add_post, drop_timeline, keep_timeline, remove_post
+
+# Поля пользователя, которые выводятся в лентах: имя автора в карточках
+# и заголовке профайла, username в ссылках на профайл.
+USER_FEED_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_delete, sender=Post)
+def remember_previous_state(sender, instance, **kwargs):
+    """Запоминает автора и группу поста, сохранённые в БД."""
+    instance._previous_state = None
+    if instance.pk is not None:
+        instance._previous_state = Post.objects.filter(
+            pk=instance.pk
+        ).values(
+            'author_id', 'group_id', 'author__username', 'group__slug'
+        ).first()
+
+
+@receiver(post_save, sender=Post)
+def update_counters_on_save(sender, instance, created, **kwargs):
+    """Обновляет счётчики постов автора и группы."""
+    previous = getattr(instance, '_previous_state', None)
+    if created or previous is None:
+        change_author_count(instance.author_id, 1)
+        change_group_count(instance.group_id, 1)
+        return
+    if previous['author_id'] != instance.author_id:
+        change_author_count(previous['author_id'], -1)
+        change_author_count(instance.author_id, 1)
+    if previous['group_id'] != instance.group_id:
+        move_group_count(previous['group_id'], instance.group_id)
+
+
+@receiver(post_delete, sender=Post)
+def update_counters_on_delete(sender, instance, **kwargs):
+    """Уменьшает счётчики постов автора и группы."""
+    previous = getattr(instance, '_previous_state', None) or {
+        'author_id': instance.author_id,
+        'group_id': instance.group_id,
+    }
+    change_author_count(previous['author_id'], -1)
+    change_group_count(previous['group_id'], -1)
+
+
+def current_feeds(instance, previous):
+    """Ленты, в которых виден пост: главная, профайл автора и группа.
+    Имя автора и slug группы, которые не менялись, уже прочитаны
+    вместе с прежним состоянием поста: лишние запросы не нужны."""
+    if previous.get('author_id') == instance.author_id:
+        username = previous['author__username']
+    else:
+        username = instance.author.username
+    feeds = [INDEX_FEED, PROFILE_FEED.format(username=username)]
+    if instance.group_id is not None:
+        if previous.get('group_id') == instance.group_id:
+            slug = previous['group__slug']
+        else:
+            slug = instance.group.slug
+        feeds.append(GROUP_FEED.format(slug=slug))
+    return feeds
+
+
+def previous_feeds(previous):
+    """Ленты, в которых пост был виден до изменения."""
+    if not previous:
+        return []
+    feeds = [INDEX_FEED,
+             PROFILE_FEED.format(username=previous['author__username'])]
+    if previous['group_id'] is not None:
+        feeds.append(GROUP_FEED.format(slug=previous['group__slug']))
+    return feeds
+
+
+@receiver(post_save, sender=Post)
+def update_feeds_on_save(sender, instance, **kwargs):
+    """Повышает версии лент, в которых был или стал виден пост:
+    их закешированные страницы перестают находиться. Добавляет пост
+    в ленты кеша лент, где он виден, и убирает из тех, откуда он ушёл
+    при смене автора или группы."""
+    previous = getattr(instance, '_previous_state', None) or {}
+    current = current_feeds(instance, previous)
+    left = [feed for feed in previous_feeds(previous) if feed not in current]
+    versions = bump_versions(*current, *left)
+    for feed in left:
+        remove_post(feed, instance.pk, versions[feed])
+    for feed in current:
+        add_post(feed, instance, versions[feed])
+
+
+@receiver(post_delete, sender=Post)
+def update_feeds_on_delete(sender, instance, **kwargs):
+    """Повышает версии лент удалённого поста и убирает его из лент
+    кеша лент."""
+    previous = getattr(instance, '_previous_state', None)
+    feeds = previous_feeds(previous) or current_feeds(instance, {})
+    versions = bump_versions(*feeds)
+    for feed in feeds:
+        remove_post(feed, instance.pk, versions[feed])
+
+
+@receiver(pre_save, sender=Group)
+def remember_previous_slug(sender, instance, **kwargs):
+    """Запоминает slug группы, сохранённый в БД."""
+    instance._previous_slug = None
+    if instance.pk is not None:
+        instance._previous_slug = Group.objects.filter(
+            pk=instance.pk).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_feeds(sender, instance, **kwargs):
+    """Повышает версии ленты группы и главной страницы, на которой
+    есть ссылки на группы."""
+    feeds = [INDEX_FEED, GROUP_FEED.format(slug=instance.slug)]
+    previous_slug = getattr(instance, '_previous_slug', None)
+    if previous_slug:
+        feeds.append(GROUP_FEED.format(slug=previous_slug))
+    for feed, version in bump_versions(*feeds).items():
+        keep_timeline(feed, version)
+
+
+@receiver(pre_save, sender=User)
+def remember_previous_name(sender, instance, update_fields=None, **kwargs):
+    """Запоминает поля пользователя, которые выводятся в лентах."""
+    instance._previous_name = None
+    if instance.pk is None or not displayed_fields_saved(update_fields):
+        return
+    instance._previous_name = User.objects.filter(
+        pk=instance.pk).values_list(*USER_FEED_FIELDS).first()
+
+
+def displayed_fields_saved(update_fields):
+    """Сохраняются ли поля пользователя, которые выводятся в лентах."""
+    return update_fields is None or not set(USER_FEED_FIELDS).isdisjoint(
+        update_fields)
+
+
+@receiver(post_save, sender=User)
+def invalidate_profile_feed(sender, instance, created, update_fields=None,
+                            **kwargs):
+    """Повышает версии лент с постами пользователя, когда меняется то,
+    что о нём выводится в лентах: имя автора есть в профайле,
+    на главной и в группах его постов. Смена пароля, last_login
+    и других полей на ленты не влияет."""
+    if not created and not displayed_fields_saved(update_fields):
+        return
+    previous = getattr(instance, '_previous_name', None)
+    current = tuple(getattr(instance, field) for field in USER_FEED_FIELDS)
+    if not created and previous == current:
+        return
+    feeds = [PROFILE_FEED.format(username=instance.username)]
+    if previous and previous[0] != instance.username:
+        feeds.append(PROFILE_FEED.format(username=previous[0]))
+    if not created:
+        feeds.append(INDEX_FEED)
+        feeds.extend(
+            GROUP_FEED.format(slug=slug) for slug in Group.objects.filter(
+                posts__author=instance
+            ).values_list('slug', flat=True).distinct()
+        )
+    for feed, version in bump_versions(*feeds).items():
+        keep_timeline(feed, version)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    """Обновляет текст поста в поисковом индексе."""
+    get_backend().index(instance.pk, instance.text)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    """Убирает пост из поискового индекса."""
+    get_backend().remove(instance.pk)
+
+
+@receiver(post_delete, sender=Group)
+def drop_group_timeline(sender, instance, **kwargs):
+    """Удаляет ленту удалённой группы."""
+    drop_timeline(GROUP_FEED.format(slug=instance.slug))
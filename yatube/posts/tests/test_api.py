@@ -0,0 +1,102 @@
+import json
+from http import HTTPStatus
+
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+class PostApiTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='auth', first_name='Иван', last_name='Петров')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(5):
+            Post.objects.create(
+                author=User.objects.create_user(username=f'author_{i}'),
+                text=f'Чужой пост {i}',
+            )
+        for i in range(3):
+            Post.objects.create(
+                author=cls.user,
+                text=f'Пост {i}',
+                group=cls.group,
+            )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def get_json(self, url, data=None):
+        response = self.guest_client.get(url, data)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        if response.streaming:
+            return json.loads(b''.join(response.streaming_content))
+        return json.loads(response.content)
+
+    def test_feeds_walk_by_cursor(self):
+        """Списочные эндпоинты отдают все посты ленты по курсору."""
+        feeds = {
+            reverse('posts:api_index'): Post.objects.all(),
+            reverse('posts:api_group_list', args=(self.group.slug,)):
+                self.group.posts.all(),
+            reverse('posts:api_profile', args=(self.user.username,)):
+                self.user.posts.all(),
+        }
+        for url, posts in feeds.items():
+            with self.subTest(url=url):
+                ids = []
+                data = self.get_json(url, {'limit': 2})
+                self.assertIsNone(data['previous'])
+                ids.extend(row['id'] for row in data['results'])
+                while data['next']:
+                    data = self.get_json(
+                        url, {'limit': 2, 'cursor': data['next']})
+                    ids.extend(row['id'] for row in data['results'])
+                self.assertEqual(
+                    ids,
+                    list(posts.order_by('-pub_date', '-pk')
+                         .values_list('pk', flat=True))
+                )
+
+    def test_field_selection(self):
+        """Параметр fields ограничивает поля в ответе."""
+        data = self.get_json(
+            reverse('posts:api_profile', args=(self.user.username,)),
+            {'fields': 'text,author_name,group'}
+        )
+        self.assertEqual(
+            data['results'][0],
+            {'text': 'Пост 2', 'author_name': 'Иван Петров',
+             'group': self.group.slug}
+        )
+        response = self.guest_client.get(
+            reverse('posts:api_index'), {'fields': 'text,password'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_post_detail(self):
+        """Эндпоинт поста отдаёт его поля или 404."""
+        post = self.user.posts.first()
+        data = self.get_json(
+            reverse('posts:api_post_detail', args=(post.pk,)))
+        self.assertEqual(data['id'], post.pk)
+        self.assertEqual(data['author'], self.user.username)
+        response = self.guest_client.get(
+            reverse('posts:api_post_detail', args=(post.pk + 100,)))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_feed_uses_single_query(self):
+        """Страница ленты читается одним запросом без N+1."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(
+                reverse('posts:api_index'), {'fields': 'author,group'})
+            b''.join(response.streaming_content)
+        self.assertEqual(len(queries), 1)
@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+
+import pytest
+
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.test import TestCase, tag
+
+from ..benchmark import WRITE_SCENARIOS, generate_dataset, run_benchmark
+from ..models import Group, Post, User
+
+SCENARIOS = (
+    'index', 'index_deep_page', 'index_anonymous', 'group_posts',
+    'profile', 'post_detail', 'post_create', 'post_edit',
+)
+
+
+# Нагрузочные замеры: python manage.py test --tag benchmark
+# или pytest -m benchmark, без них: --exclude-tag benchmark
+# или -m "not benchmark".
+@pytest.mark.benchmark
+@tag('benchmark')
+class BenchmarkTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate_dataset(users=5, groups=3, posts=300, seed=1)
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+
+    def test_generate_dataset(self):
+        """Генератор создаёт заданное количество объектов и счётчики."""
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 300)
+        group = Group.objects.first()
+        self.assertEqual(group.posts_count, group.posts.count())
+
+    def test_report(self):
+        """Отчёт содержит все сценарии с задержками, запросами и памятью."""
+        report = run_benchmark(repeat=3)
+        self.assertEqual(set(report['results']), set(SCENARIOS))
+        self.assertEqual(report['dataset']['posts'], 300)
+        for name, result in report['results'].items():
+            with self.subTest(scenario=name):
+                self.assertEqual(result['requests'], 3)
+                self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+                self.assertGreater(result['peak_memory_kb'], 0)
+                self.assertGreater(result['queries_max'], 0)
+
+    def test_query_count_does_not_grow_with_page(self):
+        """Глубокая страница ленты стоит столько же запросов, что и первая."""
+        results = run_benchmark(
+            repeat=2, only=('index', 'index_deep_page'))['results']
+        self.assertEqual(
+            results['index']['queries_max'],
+            results['index_deep_page']['queries_max']
+        )
+
+    def test_command_writes_json(self):
+        """Команда benchmark_feeds пишет отчёт в файл."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'report.json')
+            call_command('benchmark_feeds', existing_db=True, requests=1,
+                         only=['index'], output=path)
+            with open(path, encoding='utf-8') as file:
+                report = json.load(file)
+        self.assertEqual(list(report['results']), ['index'])
+
+    def test_existing_db_is_read_only_by_default(self):
+        """На текущей БД сценарии записи выполняются только
+        с --allow-writes."""
+        posts = Post.objects.count()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'report.json')
+            call_command('benchmark_feeds', existing_db=True, requests=1,
+                         output=path)
+            with open(path, encoding='utf-8') as file:
+                report = json.load(file)
+        self.assertFalse(set(report['results']) & set(WRITE_SCENARIOS))
+        self.assertEqual(Post.objects.count(), posts)
+        with self.assertRaises(CommandError):
+            call_command('benchmark_feeds', existing_db=True, requests=1,
+                         only=['post_create'])
+        self.assertEqual(Post.objects.count(), posts)
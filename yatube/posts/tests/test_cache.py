@@ -0,0 +1,170 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..cache import INDEX_FEED, page_cache_stats
+from ..models import Group, Post, User
+from ..utils import CURSOR_PARAM
+from ..versions import bump_versions
+
+
+class PostCardCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Исходный текст',
+        )
+        cls.REVERSE_INDEX = reverse('posts:index')
+
+    def setUp(self):
+        caches['template_fragments'].clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_unchanged_post_card_is_served_from_cache(self):
+        """Карточка поста берётся из кеша, пока пост не сохраняли."""
+        self.authorized_client.get(self.REVERSE_INDEX)
+        # update() не вызывает save() и не меняет версию карточки.
+        Post.objects.filter(pk=self.post.pk).update(text='Тайная правка')
+        response = self.authorized_client.get(self.REVERSE_INDEX)
+        self.assertContains(response, 'Исходный текст')
+        self.assertNotContains(response, 'Тайная правка')
+
+    def test_post_edit_invalidates_post_card(self):
+        """Редактирование поста через форму обновляет карточку."""
+        self.authorized_client.get(self.REVERSE_INDEX)
+        self.authorized_client.post(
+            reverse('posts:post_edit', args=(self.post.pk,)),
+            data={'text': 'Новый текст'},
+        )
+        response = self.authorized_client.get(self.REVERSE_INDEX)
+        self.assertContains(response, 'Новый текст')
+        self.assertNotContains(response, 'Исходный текст')
+
+    def test_author_rename_updates_post_card(self):
+        """Новое имя автора видно в карточках его постов на лентах
+        и в поиске без правки самих постов."""
+        pages = (
+            self.REVERSE_INDEX,
+            reverse('posts:profile', args=(self.user.username,)),
+            reverse('posts:search') + '?q=Исходный',
+        )
+        for page in pages:
+            self.authorized_client.get(page)
+        self.user.first_name = 'Новое'
+        self.user.last_name = 'Имя'
+        self.user.save()
+        for page in pages:
+            with self.subTest(page=page):
+                response = self.authorized_client.get(page)
+                self.assertContains(response, 'Новое Имя')
+
+
+class AnonymousPageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Другое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+        cls.REVERSE_INDEX = reverse('posts:index')
+        cls.REVERSE_GROUP_LIST = reverse(
+            'posts:group_list', args=(cls.group.slug,))
+        cls.REVERSE_OTHER_GROUP_LIST = reverse(
+            'posts:group_list', args=(cls.other_group.slug,))
+        cls.REVERSE_PROFILE = reverse(
+            'posts:profile', args=(cls.user.username,))
+
+    def setUp(self):
+        caches[settings.PAGE_CACHE_ALIAS].clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_anonymous_pages_are_cached(self):
+        """Повторный запрос гостя отдаётся из кеша,
+        авторизованный пользователь кеш не использует."""
+        for page in (self.REVERSE_INDEX, self.REVERSE_GROUP_LIST,
+                     self.REVERSE_PROFILE):
+            with self.subTest(page=page):
+                response = self.guest_client.get(page)
+                self.assertEqual(response['X-Page-Cache'], 'MISS')
+                response = self.guest_client.get(page)
+                self.assertEqual(response['X-Page-Cache'], 'HIT')
+                response = self.guest_client.get(page + '?page=2')
+                self.assertEqual(response['X-Page-Cache'], 'MISS')
+                response = self.authorized_client.get(page)
+                self.assertFalse(response.has_header('X-Page-Cache'))
+        self.assertEqual(
+            page_cache_stats(),
+            {'hits': 3, 'misses': 6, 'hit_ratio': 3 / 9}
+        )
+
+    def test_empty_cursor_has_own_entry(self):
+        """Страница с пустым курсором не подменяет обычную страницу."""
+        response = self.guest_client.get(
+            self.REVERSE_INDEX, {CURSOR_PARAM: ''})
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        response = self.guest_client.get(self.REVERSE_INDEX)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+
+    def test_version_bump_from_other_process_purges_pages(self):
+        """Страница перестаёт находиться, как только версия ленты
+        в БД выросла, даже если запись сделал другой процесс
+        и локальный кеш о ней не знает."""
+        self.guest_client.get(self.REVERSE_INDEX)
+        bump_versions(INDEX_FEED)
+        response = self.guest_client.get(self.REVERSE_INDEX)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+
+    def test_new_post_purges_only_affected_feeds(self):
+        """Новый пост сбрасывает только главную, свою группу
+        и профайл автора."""
+        pages = (self.REVERSE_INDEX, self.REVERSE_GROUP_LIST,
+                 self.REVERSE_OTHER_GROUP_LIST, self.REVERSE_PROFILE)
+        for page in pages:
+            self.guest_client.get(page)
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Новый пост', 'group': self.group.id},
+        )
+        expected = {
+            self.REVERSE_INDEX: 'MISS',
+            self.REVERSE_GROUP_LIST: 'MISS',
+            self.REVERSE_OTHER_GROUP_LIST: 'HIT',
+            self.REVERSE_PROFILE: 'MISS',
+        }
+        for page, status in expected.items():
+            with self.subTest(page=page):
+                response = self.guest_client.get(page)
+                self.assertEqual(response['X-Page-Cache'], status)
+
+    def test_moving_post_purges_both_groups(self):
+        """Перенос поста в другую группу сбрасывает обе группы."""
+        for page in (self.REVERSE_GROUP_LIST, self.REVERSE_OTHER_GROUP_LIST):
+            self.guest_client.get(page)
+        self.authorized_client.post(
+            reverse('posts:post_edit', args=(self.post.id,)),
+            data={'text': self.post.text, 'group': self.other_group.id},
+        )
+        for page in (self.REVERSE_GROUP_LIST, self.REVERSE_OTHER_GROUP_LIST):
+            with self.subTest(page=page):
+                response = self.guest_client.get(page)
+                self.assertEqual(response['X-Page-Cache'], 'MISS')
@@ -0,0 +1,127 @@
+from http import HTTPStatus
+
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Group, Post, User
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+        cls.pages = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(cls.group.slug,)),
+            reverse('posts:profile', args=(cls.user.username,)),
+            reverse('posts:post_detail', args=(cls.post.id,)),
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_matching_etag_returns_not_modified(self):
+        """Совпавший ETag даёт 304 без отрисовки шаблона."""
+        for page in self.pages:
+            with self.subTest(page=page):
+                response = self.authorized_client.get(page)
+                self.assertFalse(response.has_header('Last-Modified'))
+                response = self.authorized_client.get(
+                    page, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED)
+                self.assertFalse(response.templates)
+
+    def test_validators_do_not_scan_posts(self):
+        """ETag ленты читает только её версию, без подсчёта постов."""
+        for page in self.pages[:3]:
+            etag = self.authorized_client.get(page)['ETag']
+            with self.subTest(page=page):
+                with CaptureQueriesContext(connection) as queries:
+                    self.authorized_client.get(
+                        page, HTTP_IF_NONE_MATCH=etag)
+                feed_queries = [
+                    query['sql'] for query in queries
+                    if 'posts_' in query['sql']
+                ]
+                self.assertEqual(len(feed_queries), 1)
+                self.assertIn('posts_feedversion', feed_queries[0])
+
+    def etags(self):
+        return {
+            page: self.authorized_client.get(page)['ETag']
+            for page in self.pages
+        }
+
+    def assertChanged(self, etags):
+        for page, etag in etags.items():
+            with self.subTest(page=page):
+                response = self.authorized_client.get(
+                    page, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_post_edit_changes_etag(self):
+        """После правки поста прежний ETag перестаёт совпадать."""
+        etags = self.etags()
+        self.authorized_client.post(
+            reverse('posts:post_edit', args=(self.post.id,)),
+            data={'text': 'Новый текст', 'group': self.group.id},
+        )
+        self.assertChanged(etags)
+
+    def test_delete_and_move_change_etag(self):
+        """Удаление и перенос поста в другую группу меняют ETag лент,
+        хотя даты изменения оставшихся в них постов прежние."""
+        post = Post.objects.create(
+            author=self.user, text='Новый пост', group=self.group)
+        etags = self.etags()
+        post.delete()
+        self.assertChanged(etags)
+        post = Post.objects.create(
+            author=self.user, text='Новый пост', group=self.group)
+        etags = self.etags()
+        post.group = Group.objects.create(title='Другая', slug='other')
+        post.save()
+        self.assertChanged(etags)
+
+    def test_author_rename_changes_etag(self):
+        """Имя автора выводится в карточках: его смена меняет ETag."""
+        etags = self.etags()
+        self.user.first_name = 'Новое имя'
+        self.user.save()
+        self.assertChanged(etags)
+
+    def test_unrelated_user_save_keeps_etag(self):
+        """Сохранение пользователя без смены имени не сбрасывает
+        ETag лент."""
+        etags = self.etags()
+        user = User.objects.get(pk=self.user.pk)
+        user.email = 'auth@example.com'
+        user.save()
+        for page, etag in etags.items():
+            with self.subTest(page=page):
+                response = self.authorized_client.get(
+                    page, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_etag_depends_on_user(self):
+        """ETag гостя не подходит авторизованному пользователю."""
+        page = self.pages[0]
+        etag = Client().get(page)['ETag']
+        response = self.authorized_client.get(page, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
@@ -0,0 +1,68 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..counters import get_author_posts_count
+from ..models import AuthorCounter, Group, Post, User
+
+
+class PostCountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Другое описание',
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def assertCounters(self, author_count, group_count, other_group_count):
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(get_author_posts_count(self.user), author_count)
+        self.assertEqual(self.group.posts_count, group_count)
+        self.assertEqual(self.other_group.posts_count, other_group_count)
+
+    def test_counters_follow_create_edit_and_delete(self):
+        """Счётчики меняются при создании, смене группы и удалении поста."""
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Новый пост', 'group': self.group.id},
+        )
+        self.assertCounters(1, 1, 0)
+        post = Post.objects.get(text='Новый пост')
+        self.authorized_client.post(
+            reverse('posts:post_edit', args=(post.id,)),
+            data={'text': 'Новый пост', 'group': self.other_group.id},
+        )
+        self.assertCounters(1, 0, 1)
+        post.delete()
+        self.assertCounters(0, 0, 0)
+
+    def test_rebuild_command_restores_counters(self):
+        """Команда rebuild_post_counters пересчитывает счётчики."""
+        Post.objects.create(author=self.user, text='Пост', group=self.group)
+        AuthorCounter.objects.update(posts_count=100)
+        Group.objects.update(posts_count=100)
+        call_command('rebuild_post_counters', stdout=StringIO())
+        self.assertCounters(1, 1, 0)
+
+    def test_profile_uses_counter(self):
+        """Профайл берёт количество постов из счётчика."""
+        Post.objects.create(author=self.user, text='Пост')
+        response = self.authorized_client.get(
+            reverse('posts:profile', args=(self.user.username,)))
+        self.assertEqual(response.context['posts_count'], 1)
+        self.assertEqual(response.context['page_obj'].paginator.count, 1)
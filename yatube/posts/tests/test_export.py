@@ -0,0 +1,67 @@
+import csv
+import json
+from http import HTTPStatus
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..export import iter_posts
+from ..models import Group, Post, User
+
+
+class ExportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.other_user = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for i in range(5):
+            Post.objects.create(
+                author=cls.user, text=f'Пост {i}', group=cls.group)
+            Post.objects.create(author=cls.other_user, text=f'Другой {i}')
+
+    def test_batches_cover_all_posts(self):
+        """Выгрузка пачками отдаёт все посты ровно один раз."""
+        ids = [row['id'] for row in iter_posts(batch_size=3)]
+        self.assertEqual(
+            ids, list(Post.objects.order_by('pk').values_list('pk', flat=True))
+        )
+
+    def test_command_filters_and_formats(self):
+        """Команда export_posts фильтрует посты и пишет NDJSON и CSV."""
+        out = StringIO()
+        call_command('export_posts', group=self.group.slug, stdout=out)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(
+            {(row['author'], row['group']) for row in rows},
+            {(self.user.username, self.group.slug)}
+        )
+        out = StringIO()
+        call_command('export_posts', format='csv', author='other',
+                     since='2000-01-01', stdout=out)
+        rows = list(csv.DictReader(StringIO(out.getvalue())))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['group'], '')
+
+    def test_endpoint_is_staff_only_and_streams(self):
+        """Выгрузка по HTTP доступна только staff и отдаётся потоком."""
+        url = reverse('posts:export')
+        client = Client()
+        client.force_login(self.user)
+        self.assertEqual(client.get(url).status_code, HTTPStatus.FOUND)
+        admin = User.objects.create_user(username='admin', is_staff=True)
+        client.force_login(admin)
+        response = client.get(url, {'format': 'csv'})
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(len(content.splitlines()), 11)
+        response = client.get(url, {'since': 'вчера'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
@@ -0,0 +1,123 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..counters import get_author_posts_count
+from ..importer import import_posts
+from ..models import Group, Post, User
+from ..search import search_posts
+
+
+class ImportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def write_file(self, suffix, content):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'w', encoding='utf-8') as output:
+            output.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_import_ndjson(self):
+        """Посты загружаются пачками с датами, авторами и группами,
+        неизвестные авторы пропускаются, счётчики и поиск обновляются."""
+        rows = [
+            {'text': f'Импортированный пост {i}', 'author': 'auth',
+             'group': 'test-slug', 'pub_date': f'2020-01-0{i + 1}T10:00:00Z'}
+            for i in range(5)
+        ]
+        rows.append({'text': 'Без автора', 'author': 'nobody', 'group': ''})
+        path = self.write_file(
+            '.ndjson', '\n'.join(json.dumps(row) for row in rows))
+        out = StringIO()
+        call_command('import_posts', path, batch_size=2, stdout=out)
+        self.assertIn('загружено 5, пропущено 1', out.getvalue())
+        posts = Post.objects.filter(author=self.user, group=self.group)
+        self.assertEqual(posts.count(), 5)
+        self.assertEqual(posts.first().pub_date.year, 2020)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 5)
+        self.assertEqual(get_author_posts_count(self.user), 5)
+        self.assertEqual(len(search_posts('импортированный')), 5)
+
+    def test_import_csv_creates_authors_and_groups(self):
+        """Из CSV загружаются посты с созданием авторов и групп."""
+        path = self.write_file(
+            '.csv',
+            'text,author,group,pub_date\n'
+            'Первый,new_author,new-group,\n'
+            'Второй,auth,,2021-05-05\n'
+        )
+        call_command('import_posts', path, create_authors=True,
+                     create_groups=True, stdout=StringIO())
+        self.assertTrue(Post.objects.filter(
+            author__username='new_author', group__slug='new-group').exists())
+        self.assertTrue(Post.objects.filter(
+            author=self.user, group=None, pub_date__year=2021).exists())
+
+    def test_rows_without_text_are_skipped(self):
+        """Строки с пустым текстом и строки, которые не являются
+        объектами, пропускаются, а не роняют загрузку."""
+        rows = [
+            {'text': 'Пост', 'author': 'auth'},
+            {'text': '', 'author': 'auth'},
+            {'text': None, 'author': 'auth'},
+            [1, 2],
+            'x',
+        ]
+        path = self.write_file(
+            '.ndjson', '\n'.join(json.dumps(row) for row in rows))
+        out = StringIO()
+        call_command('import_posts', path, stdout=out)
+        self.assertIn('загружено 1, пропущено 4', out.getvalue())
+
+    def test_import_keeps_auto_pub_date_for_other_saves(self):
+        """Пока идёт загрузка, обычные посты получают дату публикации
+        автоматически: даты из файла не меняют поле модели."""
+        created = []
+
+        def create_post(imported, skipped):
+            created.append(Post.objects.create(author=self.user, text='Свой'))
+
+        import_posts(
+            [{'text': 'Старый', 'author': 'auth',
+              'pub_date': '2020-01-01T10:00:00Z'}],
+            on_batch=create_post,
+        )
+        self.assertEqual(
+            Post.objects.get(text='Старый').pub_date.year, 2020)
+        self.assertGreater(
+            created[0].pub_date, timezone.now() - timedelta(minutes=1))
+
+    def test_failed_import_keeps_derived_data(self):
+        """Пачки до неверной строки сохранены, и счётчики с поиском
+        обновлены, хотя загрузка прервалась ошибкой."""
+        rows = [
+            {'text': f'Сохранённый пост {i}', 'author': 'auth',
+             'group': 'test-slug'}
+            for i in range(2)
+        ]
+        rows.append({'author': 'auth'})
+        path = self.write_file(
+            '.ndjson', '\n'.join(json.dumps(row) for row in rows))
+        with self.assertRaises(CommandError):
+            call_command('import_posts', path, batch_size=2,
+                         stdout=StringIO())
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 2)
+        self.assertEqual(get_author_posts_count(self.user), 2)
+        self.assertEqual(len(search_posts('сохранённый')), 2)
@@ -1,7 +1,9 @@
+from django.core.paginator import Page, Paginator
 from django.test import Client, TestCase
 from django.urls import reverse
 
 from ..models import Group, Post, User
+from ..utils import ELLIPSIS, elided_page_range
 from ..views import VIEW_ELEMENTS
 
 POST_AMOUNT = VIEW_ELEMENTS + 1
@@ -60,3 +62,82 @@ class PaginatorViewsTest(TestCase):
                     len(response.context['page_obj']),
                     POST_AMOUNT - VIEW_ELEMENTS
                 )
+
+    def test_cursor_pages_cover_all_posts(self):
+        """Проверяет, что навигация по курсору проходит все посты
+        без пропусков и повторов в обе стороны."""
+        for reverse_name in self.check_pages:
+            with self.subTest(reverse_name=reverse_name):
+                response = self.authorized_client.get(
+                    reverse_name + '?cursor=')
+                first_page = response.context['page_obj']
+                self.assertIsInstance(first_page, Page)
+                self.assertIsInstance(first_page.paginator, Paginator)
+                self.assertEqual(len(first_page), VIEW_ELEMENTS)
+                self.assertFalse(first_page.has_previous())
+                self.assertTrue(first_page.has_next())
+                response = self.authorized_client.get(
+                    reverse_name + '?cursor=' + first_page.next_cursor)
+                second_page = response.context['page_obj']
+                self.assertEqual(
+                    len(second_page), POST_AMOUNT - VIEW_ELEMENTS)
+                self.assertFalse(second_page.has_next())
+                self.assertEqual(
+                    list(first_page) + list(second_page),
+                    list(Post.objects.order_by('-pub_date', '-pk'))
+                )
+                response = self.authorized_client.get(
+                    reverse_name + '?cursor=' + second_page.previous_cursor)
+                self.assertEqual(
+                    list(response.context['page_obj']), list(first_page))
+                self.assertFalse(response.context['page_obj'].has_previous())
+
+    def test_broken_cursor_returns_first_page(self):
+        """Проверяет, что испорченный курсор ведёт на первую страницу."""
+        response = self.authorized_client.get(
+            self.REVERSE_INDEX + '?cursor=broken')
+        self.assertEqual(
+            list(response.context['page_obj']),
+            list(Post.objects.order_by('-pub_date', '-pk')[:VIEW_ELEMENTS])
+        )
+
+
+class ElidedPageRangeTest(TestCase):
+    def get_range(self, number, num_pages=20):
+        page_obj = Paginator(range(num_pages), 1).page(number)
+        return elided_page_range(page_obj)
+
+    def test_short_range_is_not_elided(self):
+        """Если страниц мало, выводятся все номера."""
+        self.assertEqual(self.get_range(3, num_pages=6), [1, 2, 3, 4, 5, 6])
+
+    def test_edge_windows(self):
+        """Окно у начала, в середине и у конца списка страниц."""
+        expected_ranges = {
+            1: [1, 2, 3, ELLIPSIS, 20],
+            4: [1, 2, 3, 4, 5, 6, ELLIPSIS, 20],
+            5: [1, 2, 3, 4, 5, 6, 7, ELLIPSIS, 20],
+            6: [1, ELLIPSIS, 4, 5, 6, 7, 8, ELLIPSIS, 20],
+            10: [1, ELLIPSIS, 8, 9, 10, 11, 12, ELLIPSIS, 20],
+            15: [1, ELLIPSIS, 13, 14, 15, 16, 17, ELLIPSIS, 20],
+            16: [1, ELLIPSIS, 14, 15, 16, 17, 18, 19, 20],
+            17: [1, ELLIPSIS, 15, 16, 17, 18, 19, 20],
+            20: [1, ELLIPSIS, 18, 19, 20],
+        }
+        for number, expected in expected_ranges.items():
+            with self.subTest(number=number):
+                self.assertEqual(self.get_range(number), expected)
+
+    def test_paginator_renders_bounded_window(self):
+        """Навигация выводит ограниченное число ссылок на страницы."""
+        user = User.objects.create_user(username='many_posts')
+        Post.objects.bulk_create(
+            Post(author=user, text=f'Пост {i}')
+            for i in range(VIEW_ELEMENTS * 30)
+        )
+        response = self.client.get(reverse('posts:index') + '?page=15')
+        self.assertEqual(
+            response.context['page_obj'].elided_page_range,
+            [1, ELLIPSIS, 13, 14, 15, 16, 17, ELLIPSIS, 30]
+        )
+        self.assertContains(response, 'class="page-link"', count=13)
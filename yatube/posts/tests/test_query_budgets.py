@@ -0,0 +1,111 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.queries import QueryAuditor
+
+from ..models import Group, Post, User
+
+
+class QueryBudgetTest(TestCase):
+    """Представления укладываются в бюджеты запросов QUERY_BUDGETS
+    и не повторяют одинаковые запросы (N+1)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.other_user = User.objects.create_user(username='other')
+        cls.groups = [
+            Group.objects.create(
+                title=f'Группа {i}', slug=f'group-{i}',
+                description='Описание')
+            for i in range(3)
+        ]
+        # Больше одной страницы постов разных авторов и групп.
+        for i in range(25):
+            Post.objects.create(
+                author=(cls.user, cls.other_user)[i % 2],
+                group=cls.groups[i % 3] if i % 4 else None,
+                text=f'Тестовый пост {i}',
+            )
+        cls.post = cls.user.posts.filter(group__isnull=False).first()
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def requests(self):
+        """Имя URL -> (метод, url, данные) для каждого бюджета."""
+        group = self.groups[0]
+        username = self.user.username
+        return {
+            'posts:index': ('get', reverse('posts:index'), {'page': 2}),
+            'posts:group_list': (
+                'get', reverse('posts:group_list', args=(group.slug,)), {}),
+            'posts:profile': (
+                'get', reverse('posts:profile', args=(username,)), {}),
+            'posts:post_detail': (
+                'get', reverse('posts:post_detail', args=(self.post.pk,)),
+                {}),
+            'posts:post_create': (
+                'post', reverse('posts:post_create'),
+                {'text': 'Новый пост', 'group': group.pk}),
+            'posts:post_edit': (
+                'post', reverse('posts:post_edit', args=(self.post.pk,)),
+                {'text': 'Изменённый пост', 'group': group.pk}),
+            'posts:search': ('get', reverse('posts:search'), {'q': 'пост'}),
+            'posts:api_index': ('get', reverse('posts:api_index'), {}),
+            'posts:api_group_list': (
+                'get', reverse('posts:api_group_list', args=(group.slug,)),
+                {}),
+            'posts:api_profile': (
+                'get', reverse('posts:api_profile', args=(username,)), {}),
+            'posts:api_post_detail': (
+                'get', reverse('posts:api_post_detail', args=(self.post.pk,)),
+                {}),
+        }
+
+    def test_every_budget_is_checked(self):
+        """Для каждого бюджета из настроек есть проверка."""
+        self.assertEqual(set(self.requests()), set(settings.QUERY_BUDGETS))
+
+    def test_views_fit_query_budgets(self):
+        """Представления не превышают бюджет и не повторяют запросы.
+        Кеши пусты: ленты строятся при первом чтении."""
+        for url_name, (method, url, data) in self.requests().items():
+            with self.subTest(url_name=url_name):
+                budget = settings.QUERY_BUDGETS[url_name]
+                with QueryAuditor(budget=budget, slow_ms=float('inf'),
+                                  fail=True):
+                    response = getattr(self.authorized_client, method)(
+                        url, data)
+                self.assertLess(response.status_code, 400)
+
+    def test_costliest_writes_fit_query_budgets(self):
+        """Бюджеты покрывают самые дорогие записи: первый пост нового
+        автора, для которого заводится счётчик постов, и перенос поста
+        из одной группы в другую, при котором меняются счётчики обеих
+        групп."""
+        newcomer = User.objects.create_user(username='newcomer')
+        newcomer_client = Client()
+        newcomer_client.force_login(newcomer)
+        other_group = next(
+            group for group in self.groups if group.pk != self.post.group_id)
+        cases = (
+            ('posts:post_create', newcomer_client,
+             reverse('posts:post_create'),
+             {'text': 'Первый пост', 'group': other_group.pk}),
+            ('posts:post_edit', self.authorized_client,
+             reverse('posts:post_edit', args=(self.post.pk,)),
+             {'text': 'Перенесённый пост', 'group': other_group.pk}),
+        )
+        for url_name, client, url, data in cases:
+            with self.subTest(url_name=url_name):
+                budget = settings.QUERY_BUDGETS[url_name]
+                with QueryAuditor(budget=budget, slow_ms=float('inf'),
+                                  fail=True):
+                    response = client.post(url, data)
+                self.assertLess(response.status_code, 400)
@@ -0,0 +1,59 @@
+import re
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+from ..models import Group, Post, User
+from ..utils import NEXT, PREVIOUS, CursorPaginator
+from ..views import VIEW_ELEMENTS
+
+# Полный просмотр таблицы постов без использования индекса.
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?posts_post(?! USING)')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN есть в SQLite')
+class FeedQueryPlanTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+
+    def explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_feed_querysets_use_indexes(self):
+        """Запросы лент не сортируют посты во временном B-дереве
+        и не просматривают таблицу постов целиком."""
+        feeds = {
+            'index': Post.objects.feed(),
+            'group_posts': self.group.posts.feed(),
+            'profile': self.user.posts.feed(),
+        }
+        querysets = {}
+        for name, feed in feeds.items():
+            querysets[name] = feed[:VIEW_ELEMENTS]
+            paginator = CursorPaginator(feed, VIEW_ELEMENTS)
+            for direction in (NEXT, PREVIOUS):
+                position = (direction, self.post.pub_date, self.post.pk)
+                querysets[f'{name} {direction}'] = paginator.get_queryset(
+                    position)
+        for name, queryset in querysets.items():
+            with self.subTest(queryset=name):
+                plan = self.explain(queryset)
+                for step in plan:
+                    self.assertNotIn('USE TEMP B-TREE', step, plan)
+                    self.assertIsNone(FULL_SCAN.match(step), plan)
@@ -0,0 +1,88 @@
+from django.contrib.admin.sites import site
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from ..models import Post, User
+from ..search import InvertedIndexBackend, get_backend, search_posts, stem
+from ..views import VIEW_ELEMENTS
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.cat_post = Post.objects.create(
+            author=cls.user,
+            text='Кошки любят гулять по крышам',
+        )
+        cls.cats_post = Post.objects.create(
+            author=cls.user,
+            text='Кошка и кошки: кошками полон двор',
+        )
+        cls.dog_post = Post.objects.create(
+            author=cls.user,
+            text='Собака гуляла во дворе',
+        )
+
+    def test_stem_drops_endings(self):
+        """Разные формы слова сводятся к одной основе."""
+        for word in ('кошка', 'кошки', 'кошками', 'кошкой'):
+            with self.subTest(word=word):
+                self.assertEqual(stem(word), 'кошк')
+
+    def test_backends_rank_results(self):
+        """Оба движка находят формы слова и ранжируют выдачу."""
+        backends = (get_backend(), InvertedIndexBackend())
+        for backend in backends:
+            with self.subTest(backend=type(backend).__name__):
+                self.assertEqual(
+                    backend.search('кошкам'),
+                    [self.cats_post.pk, self.cat_post.pk]
+                )
+                self.assertEqual(
+                    backend.search('гулять двор'), [self.dog_post.pk])
+                self.assertEqual(backend.search('...'), [])
+
+    def test_index_follows_post_changes(self):
+        """Индекс обновляется при правке и удалении поста."""
+        backend = InvertedIndexBackend()
+        backend.search('кошка')
+        dog_post = Post.objects.get(pk=self.dog_post.pk)
+        dog_post.text = 'Собака гонялась за кошкой'
+        dog_post.save()
+        backend.index(dog_post.pk, dog_post.text)
+        self.assertIn(dog_post.pk, search_posts('кошка'))
+        self.assertIn(dog_post.pk, backend.search('кошка'))
+        Post.objects.get(pk=self.cat_post.pk).delete()
+        backend.remove(self.cat_post.pk)
+        self.assertNotIn(self.cat_post.pk, search_posts('кошка'))
+        self.assertNotIn(self.cat_post.pk, backend.search('кошка'))
+        self.assertEqual(backend._terms, sorted(backend._postings))
+
+    def test_search_view(self):
+        """Страница поиска выводит найденные посты постранично."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Кошачий пост {i}')
+            for i in range(VIEW_ELEMENTS + 1)
+        )
+        for post in Post.objects.filter(text__startswith='Кошачий'):
+            get_backend().index(post.pk, post.text)
+        response = Client().get(reverse('posts:search'), {'q': 'кошачий'})
+        self.assertEqual(len(response.context['page_obj']), VIEW_ELEMENTS)
+        self.assertContains(response, '?q=%D0%BA%D0%BE%D1%88%D0%B0%D1%87')
+        response = Client().get(
+            reverse('posts:search'), {'q': 'кошка', 'page': 1})
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.cats_post, self.cat_post]
+        )
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке использует поисковый индекс."""
+        request = RequestFactory().get('/')
+        model_admin = site._registry[Post]
+        queryset, _ = model_admin.get_search_results(
+            request, Post.objects.all(), 'кошками')
+        self.assertEqual(
+            set(queryset), {self.cat_post, self.cats_post})
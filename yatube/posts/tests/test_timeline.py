@@ -0,0 +1,190 @@
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..cache import GROUP_FEED, INDEX_FEED, PROFILE_FEED
+from ..models import Group, Post, User
+from ..timeline import get_timeline_cache, timeline_key
+from ..versions import bump_all_versions, bump_versions
+
+
+class TimelineTest(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Другое описание',
+        )
+        for i in range(15):
+            Post.objects.create(
+                author=cls.user, text=f'Пост {i}', group=cls.group)
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def timeline_ids(self, feed):
+        _, entries = get_timeline_cache().get(timeline_key(feed))
+        return [pk for _, pk in entries]
+
+    def page_ids(self, url, page=1):
+        response = self.authorized_client.get(url, {'page': page})
+        return [post.pk for post in response.context['page_obj']]
+
+    def expected_ids(self, post_list, page=1):
+        start = (page - 1) * 10
+        return list(post_list.order_by('-pub_date', '-pk').values_list(
+            'pk', flat=True)[start:start + 10])
+
+    def test_page_is_read_by_ids(self):
+        """С прогретой лентой страница читается по id без сортировки
+        таблицы постов."""
+        url = reverse('posts:index')
+        self.authorized_client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            ids = self.page_ids(url, page=2)
+        self.assertEqual(ids, self.expected_ids(Post.objects, page=2))
+        post_queries = [query['sql'] for query in queries
+                        if 'FROM "posts_post" INNER JOIN' in query['sql']]
+        self.assertEqual(len(post_queries), 1)
+        self.assertIn('"posts_post"."id" IN (', post_queries[0])
+        self.assertNotIn('ORDER BY', post_queries[0])
+
+    def test_feeds_match_database(self):
+        """Ленты главной, группы и автора совпадают с выборкой из БД."""
+        for url, post_list in (
+            (reverse('posts:index'), Post.objects.all()),
+            (reverse('posts:group_list', args=(self.group.slug,)),
+             self.group.posts.all()),
+            (reverse('posts:profile', args=(self.user.username,)),
+             self.user.posts.all()),
+        ):
+            for page in (1, 2):
+                with self.subTest(url=url, page=page):
+                    self.assertEqual(
+                        self.page_ids(url, page),
+                        self.expected_ids(post_list, page)
+                    )
+
+    def test_new_post_is_added_without_rebuild(self):
+        """Новый пост встаёт в начало прогретых лент."""
+        self.page_ids(reverse('posts:index'))
+        self.page_ids(reverse('posts:group_list', args=(self.group.slug,)))
+        post = Post.objects.create(
+            author=self.user, text='Новый пост', group=self.group)
+        for feed in (INDEX_FEED, GROUP_FEED.format(slug=self.group.slug)):
+            with self.subTest(feed=feed):
+                self.assertEqual(self.timeline_ids(feed)[0], post.pk)
+        # Ленту автора никто не читал: её построит первое чтение.
+        self.assertIsNone(get_timeline_cache().get(timeline_key(
+            PROFILE_FEED.format(username=self.user.username))))
+
+    def test_regrouped_and_deleted_posts(self):
+        """Пост переходит между лентами групп при смене группы
+        и уходит из лент при удалении."""
+        group_url = reverse('posts:group_list', args=(self.group.slug,))
+        other_url = reverse('posts:group_list', args=(self.other_group.slug,))
+        self.page_ids(group_url)
+        self.page_ids(other_url)
+        post = self.group.posts.first()
+        post.group = self.other_group
+        post.save()
+        self.assertNotIn(
+            post.pk,
+            self.timeline_ids(GROUP_FEED.format(slug=self.group.slug)))
+        self.assertEqual(self.page_ids(other_url), [post.pk])
+        post.delete()
+        self.assertEqual(self.page_ids(other_url), [])
+        self.assertEqual(
+            self.page_ids(group_url), self.expected_ids(self.group.posts))
+
+    def test_stale_timeline_is_rebuilt(self):
+        """Лента с несуществующими постами удаляется, страница
+        читается из БД, следующее чтение строит ленту заново."""
+        url = reverse('posts:index')
+        self.page_ids(url)
+        key = timeline_key(INDEX_FEED)
+        version, entries = get_timeline_cache().get(key)
+        entries[0] = (entries[0][0], 10 ** 6)
+        get_timeline_cache().set(key, (version, entries), None)
+        self.assertEqual(self.page_ids(url), self.expected_ids(Post.objects))
+        self.assertIsNone(get_timeline_cache().get(key))
+        self.assertEqual(self.page_ids(url), self.expected_ids(Post.objects))
+        self.assertNotIn(10 ** 6, self.timeline_ids(INDEX_FEED))
+
+    @override_settings(TIMELINE_SIZE=10)
+    def test_writes_of_other_processes_are_seen(self):
+        """Полная лента строится заново, когда версия ленты в БД
+        изменилась без сигналов этого процесса: запись другого воркера
+        или bulk_create с bump_all_versions()."""
+        url = reverse('posts:index')
+        for bump in (lambda: bump_versions(INDEX_FEED), bump_all_versions):
+            self.page_ids(url)
+            with self.subTest(bump=bump):
+                Post.objects.bulk_create(
+                    [Post(author=self.user, text='Пост из другого процесса')]
+                )
+                bump()
+                self.assertEqual(
+                    self.page_ids(url), self.expected_ids(Post.objects))
+
+    @override_settings(TIMELINE_SIZE=10)
+    def test_pages_beyond_timeline(self):
+        """Номера страниц заканчиваются вместе с кешем лент, дальше
+        лента листается по курсору без COUNT(*) и OFFSET."""
+        for url, post_list in (
+                (reverse('posts:index'), Post.objects),
+                (reverse('posts:group_list', args=(self.group.slug,)),
+                 self.group.posts)):
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url, {'page': 2})
+                page_obj = response.context['page_obj']
+                self.assertEqual(page_obj.paginator.num_pages, 1)
+                self.assertEqual([post.pk for post in page_obj],
+                                 self.expected_ids(post_list))
+                self.assertContains(
+                    response, f'?cursor={page_obj.next_cursor}')
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.authorized_client.get(
+                        url, {'cursor': page_obj.next_cursor})
+                self.assertEqual(
+                    [post.pk for post in response.context['page_obj']],
+                    self.expected_ids(post_list, page=2))
+                for query in queries:
+                    self.assertNotIn('COUNT(', query['sql'])
+                    self.assertNotIn('OFFSET', query['sql'])
+        self.assertEqual(len(self.timeline_ids(INDEX_FEED)), 10)
+
+    @override_settings(TIMELINE_SIZE=10)
+    def test_removal_from_full_timeline(self):
+        """После удаления поста из полной ленты страница снова полная:
+        лента строится заново и берёт следующий пост."""
+        url = reverse('posts:index')
+        self.page_ids(url)
+        Post.objects.order_by('-pub_date', '-pk').first().delete()
+        self.assertEqual(self.page_ids(url), self.expected_ids(Post.objects))
+        self.assertEqual(len(self.page_ids(url)), 10)
+
+    def test_index_is_counted_by_timeline(self):
+        """Главная, которая помещается в кеш лент, не считает посты
+        через COUNT(*)."""
+        url = reverse('posts:index')
+        self.page_ids(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(url, {'page': 2})
+        self.assertEqual(response.context['page_obj'].paginator.count, 15)
+        self.assertFalse(response.context['page_obj'].next_cursor)
+        for query in queries:
+            self.assertNotIn('COUNT(', query['sql'])
@@ -1,8 +1,12 @@
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from ..models import Post, Group, User
 from ..forms import PostForm
+from ..timeline import reset_timelines
+from ..views import VIEW_ELEMENTS
 
 
 class PostPagesTest(TestCase):
@@ -129,3 +133,43 @@ class PostPagesTest(TestCase):
             reverse('posts:group_list', kwargs={'slug': group_1.slug})
         )
         self.assertNotIn(result, response.context['page_obj'])
+
+    def test_feed_pages_use_constant_number_of_queries(self):
+        """Количество запросов к БД на страницах с постами
+        не зависит от количества постов на странице."""
+        check_pages = (
+            self.REVERSE_INDEX,
+            self.REVERSE_GROUP_LIST,
+            self.REVERSE_PROFILE
+        )
+        # Каждая страница читается с непрогретой лентой.
+        queries_with_one_post = {}
+        for page in check_pages:
+            reset_timelines()
+            with CaptureQueriesContext(connection) as queries:
+                self.authorized_client.get(page)
+            queries_with_one_post[page] = len(queries)
+        other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Другое описание',
+        )
+        for i in range(VIEW_ELEMENTS):
+            Post.objects.create(
+                author=User.objects.create_user(username=f'author_{i}'),
+                text=f'Пост {i}',
+                group=self.group if i % 2 else other_group,
+            )
+            Post.objects.create(
+                author=self.user,
+                text=f'Пост автора {i}',
+                group=self.group,
+            )
+        for page in check_pages:
+            reset_timelines()
+            with self.subTest(page=page):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.authorized_client.get(page)
+                self.assertEqual(
+                    len(response.context['page_obj']), VIEW_ELEMENTS)
+                self.assertEqual(len(queries), queries_with_one_post[page])
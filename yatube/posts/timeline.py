@@ -0,0 +1,167 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Изменения лент в кеше процесса не должны перемешиваться.
+_lock = threading.Lock()
+
+
+def get_timeline_cache():
+    return caches[settings.TIMELINE_CACHE_ALIAS]
+
+
+def timeline_key(feed):
+    """Ключ ленты с именем feed из posts.cache в кеше лент."""
+    return f'timeline:{feed}'
+
+
+def _entry(pub_date, pk):
+    return pub_date.timestamp(), pk
+
+
+def build_timeline(feed, post_list, version):
+    """Строит ленту из БД: TIMELINE_SIZE новейших пар
+    (время публикации, id), от новых к старым. Лента хранится вместе
+    с версией ленты из posts.versions, для которой построена."""
+    entries = [
+        _entry(pub_date, pk) for pub_date, pk in post_list.order_by(
+            '-pub_date', '-pk'
+        ).values_list('pub_date', 'pk')[:settings.TIMELINE_SIZE]
+    ]
+    get_timeline_cache().set(timeline_key(feed), (version, entries), None)
+    return entries
+
+
+def _update(feed, version, change):
+    """Применяет change к ленте, если она построена для версии,
+    предшествующей version: между ними нет чужих изменений. Иначе,
+    или если change вернул None, удаляет ленту, её построит первое
+    чтение. Ленту, которой нет в кеше, тоже построит первое чтение."""
+    key = timeline_key(feed)
+    common, own = version
+    with _lock:
+        cache = get_timeline_cache()
+        cached = cache.get(key)
+        if cached is None:
+            return
+        entries = None
+        if cached[0] == (common, own - 1):
+            entries = change(cached[1])
+        if entries is None:
+            cache.delete(key)
+            return
+        cache.set(key, (version, entries), None)
+
+
+def add_post(feed, post, version):
+    """Вставляет пост в ленту на место по дате публикации."""
+    entry = _entry(post.pub_date, post.pk)
+
+    def change(entries):
+        entries = [item for item in entries if item[1] != post.pk]
+        position = 0
+        while position < len(entries) and entries[position] > entry:
+            position += 1
+        entries.insert(position, entry)
+        return entries[:settings.TIMELINE_SIZE]
+
+    _update(feed, version, change)
+
+
+def remove_post(feed, post_id, version):
+    """Убирает пост из ленты. Полная лента удаляется: на место поста
+    встал бы следующий, которого в ней нет. Поэтому неполная лента
+    всегда содержит все посты ленты."""
+    def change(entries):
+        if len(entries) >= settings.TIMELINE_SIZE:
+            return None
+        return [item for item in entries if item[1] != post_id]
+
+    _update(feed, version, change)
+
+
+def keep_timeline(feed, version):
+    """Переносит ленту на новую версию после изменения, которое не меняет
+    состав ленты: правки группы или автора."""
+    _update(feed, version, lambda entries: entries)
+
+
+def drop_timeline(feed):
+    get_timeline_cache().delete(timeline_key(feed))
+
+
+def reset_timelines():
+    """Сбрасывает все ленты, например после bulk_create."""
+    get_timeline_cache().clear()
+
+
+class TimelineList:
+    """Список постов ленты для Paginator.
+
+    Список ограничен первыми TIMELINE_SIZE постами ленты: дальше лента
+    листается по курсору (posts.utils.split_pages). Срез читается одним
+    запросом по первичному ключу из списка id в кеше, без сортировки
+    таблицы и OFFSET. Лента строится заново, если её версия отстала
+    от версии в БД: так видны изменения, сделанные другими процессами
+    и в обход сигналов, после которых вызван bump_all_versions().
+    total - число постов ленты из счётчика; без него неполная лента
+    сама знает число постов, и COUNT(*) не нужен."""
+    ordered = True
+
+    def __init__(self, feed, post_list, version, total=None):
+        self.feed = feed
+        self.post_list = post_list
+        self.version = version
+        self.total = total
+
+    def count(self):
+        """Число постов, доступных по номерам страниц."""
+        if self.total is not None:
+            return min(self.total, settings.TIMELINE_SIZE)
+        return len(self.entries())
+
+    def __len__(self):
+        return self.count()
+
+    def truncated(self):
+        """Может ли в ленте быть больше постов, чем TIMELINE_SIZE."""
+        if self.total is not None:
+            return self.total > settings.TIMELINE_SIZE
+        return len(self.entries()) >= settings.TIMELINE_SIZE
+
+    def entries(self):
+        cached = get_timeline_cache().get(timeline_key(self.feed))
+        if cached is None or cached[0] != self.version:
+            return build_timeline(self.feed, self.post_list, self.version)
+        entries = cached[1]
+        # Со счётчиком видно, что в ленте не хватает постов.
+        if (self.total is not None
+                and len(entries) != min(self.total, settings.TIMELINE_SIZE)):
+            entries = build_timeline(self.feed, self.post_list, self.version)
+        return entries
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        posts = self._fetch(self.entries()[index])
+        if posts is None:
+            # Лента разошлась с БД при той же версии (например, запись
+            # откатилась): страница читается из БД, а лента удаляется
+            # и строится следующим чтением. Так запрос стоит не дороже
+            # первого чтения ленты и укладывается в бюджет.
+            drop_timeline(self.feed)
+            posts = list(self.post_list.order_by('-pub_date', '-pk')[index])
+        return posts
+
+    def _fetch(self, entries):
+        """Посты по id из ленты в порядке ленты или None, если какой-то
+        пост удалён, ушёл из ленты или его дата не совпадает с лентой."""
+        posts = self.post_list.in_bulk([pk for _, pk in entries])
+        result = []
+        for entry in entries:
+            post = posts.get(entry[1])
+            if post is None or _entry(post.pub_date, post.pk) != entry:
+                return None
+            result.append(post)
+        return result
@@ -1,6 +1,6 @@
 # posts/urls.py
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = 'posts'
 urlpatterns = [
@@ -13,5 +13,17 @@ urlpatterns = [
     # Добавление новой записи
     path('create/', views.post_create, name='post_create'),
     # Редактироваине существующей записи
-    path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit')
+    path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    # Поиск по постам
+    path('search/', views.search, name='search'),
+    # JSON API лент и постов
+    path('api/posts/', api.index, name='api_index'),
+    path('api/group/<slug:slug>/', api.group_posts, name='api_group_list'),
+    path('api/profile/<str:username>/', api.profile, name='api_profile'),
+    path('api/posts/<int:post_id>/', api.post_detail,
+         name='api_post_detail'),
+    # Выгрузка постов для аналитики (только для staff)
+    path('export/', views.export_posts, name='export'),
+    # Статистика кеша страниц лент для мониторинга
+    path('cache/stats/', views.cache_stats, name='cache_stats'),
 ]
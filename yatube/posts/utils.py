@@ -1,12 +1,180 @@
-from django.core.paginator import Paginator
+import base64
+import binascii
 
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 
-def split_pages(request, post_list, VIEW_ELEMENTS):
+from .timeline import TimelineList
+from .versions import feed_version
+
+# Имя GET-параметра с курсором для постраничной навигации по ключу.
+CURSOR_PARAM = 'cursor'
+# Направления перехода по курсору.
+NEXT = 'n'
+PREVIOUS = 'p'
+# Пропуск в списке номеров страниц.
+ELLIPSIS = '…'
+
+
+def encode_cursor(direction, pub_date, pk):
+    """Упаковывает направление и ключ (pub_date, id) в непрозрачный токен."""
+    raw = f'{direction}|{pub_date.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковывает токен курсора.
+    Возвращает (direction, pub_date, pk) или None, если токен испорчен."""
+    if not token:
+        return None
+    try:
+        padding = '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(token + padding).decode()
+        direction, pub_date, pk = raw.split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if direction not in (NEXT, PREVIOUS) or pub_date is None:
+        return None
+    return direction, pub_date, pk
+
+
+def _position(obj):
+    """Ключ (pub_date, id) поста или словаря из .values()."""
+    if isinstance(obj, dict):
+        return obj['pub_date'], obj['pk']
+    return obj.pub_date, obj.pk
+
+
+class CursorPage(Page):
+    """Страница постраничной навигации по ключу (pub_date, id).
+    У неё нет номера: переходы между страницами идут по курсорам."""
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} objects>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return ''
+        return encode_cursor(NEXT, *_position(self.object_list[-1]))
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return ''
+        return encode_cursor(PREVIOUS, *_position(self.object_list[0]))
+
+
+class CursorPaginator(Paginator):
+    """Постраничная навигация по ключу (pub_date, id) без COUNT(*) и OFFSET.
+    Стоимость запроса не зависит от глубины страницы. count и num_pages
+    унаследованы от Paginator и выполняют COUNT(*): навигации по курсору
+    они не нужны."""
+
+    def get_queryset(self, position):
+        """Возвращает запрос строк страницы для позиции курсора
+        (с одной лишней строкой, чтобы узнать, есть ли страница дальше)."""
+        queryset = self.object_list
+        if position is None:
+            return queryset.order_by('-pub_date', '-pk')[:self.per_page + 1]
+        direction, pub_date, pk = position
+        if direction == NEXT:
+            return queryset.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+            ).order_by('-pub_date', '-pk')[:self.per_page + 1]
+        return queryset.filter(
+            Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+        ).order_by('pub_date', 'pk')[:self.per_page + 1]
+
+    def get_page(self, cursor):
+        """Возвращает страницу по токену курсора.
+        Пустой или испорченный токен означает первую страницу."""
+        position = decode_cursor(cursor)
+        rows = list(self.get_queryset(position))
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if position is None:
+            return CursorPage(rows, self, has_next=more, has_previous=False)
+        if position[0] == NEXT:
+            return CursorPage(rows, self, has_next=more, has_previous=True)
+        rows.reverse()
+        return CursorPage(rows, self, has_next=True, has_previous=more)
+
+
+def elided_page_range(page_obj, on_each_side=2, on_ends=1):
+    """Возвращает номера страниц для навигации: первые и последние
+    on_ends страниц и окно в on_each_side страниц вокруг текущей,
+    пропуски между ними обозначены ELLIPSIS."""
+    number = page_obj.number
+    num_pages = page_obj.paginator.num_pages
+    if num_pages <= (on_each_side + on_ends) * 2:
+        return list(range(1, num_pages + 1))
+    pages = []
+    if number > on_each_side + on_ends + 2:
+        pages.extend(range(1, on_ends + 1))
+        pages.append(ELLIPSIS)
+        pages.extend(range(number - on_each_side, number + 1))
+    else:
+        pages.extend(range(1, number + 1))
+    if number < num_pages - on_each_side - on_ends - 1:
+        pages.extend(range(number + 1, number + on_each_side + 1))
+        pages.append(ELLIPSIS)
+        pages.extend(range(num_pages - on_ends + 1, num_pages + 1))
+    else:
+        pages.extend(range(number + 1, num_pages + 1))
+    return pages
+
+
+def split_pages(request, post_list, VIEW_ELEMENTS, keyset=False, count=None,
+                timeline=None):
+    # Навигация по курсору включается для представления флагом keyset
+    # или наличием параметра cursor в запросе.
+    if keyset or CURSOR_PARAM in request.GET:
+        paginator = CursorPaginator(post_list, VIEW_ELEMENTS)
+        return paginator.get_page(request.GET.get(CURSOR_PARAM))
+    # Ленты timeline (имя ленты из posts.cache) листаются по номерам
+    # страниц только в пределах кеша лент: страницы читаются по списку
+    # id, без COUNT(*) и OFFSET; count - число постов ленты из счётчика.
+    # Последняя из них продолжается по курсору, поэтому и глубокие
+    # страницы не дороже первой.
+    if timeline is not None:
+        post_list = TimelineList(
+            timeline, post_list, feed_version(request, timeline), count)
     # Показывать на странице кол-во записей = VIEW_ELEMENTS.
     paginator = Paginator(post_list, VIEW_ELEMENTS)
     # Из URL извлекаем номер запрошенной страницы - это значение параметра page
     page_number = request.GET.get('page')
     # Получаем набор записей для страницы с запрошенным номером
     page_obj = paginator.get_page(page_number)
-
+    # Номера страниц для шаблона: без ссылки на каждую из тысяч страниц.
+    page_obj.elided_page_range = elided_page_range(page_obj)
+    if timeline is not None and not page_obj.has_next():
+        page_obj.next_cursor = continuation_cursor(page_obj, post_list)
     return page_obj
+
+
+def continuation_cursor(page_obj, timeline_list):
+    """Курсор продолжения ленты за последней нумерованной страницей
+    или '', если глубже постов нет."""
+    if not page_obj.object_list or not timeline_list.truncated():
+        return ''
+    position = (NEXT, *_position(page_obj.object_list[-1]))
+    if timeline_list.total is None and not CursorPaginator(
+            timeline_list.post_list, 1).get_queryset(position).exists():
+        return ''
+    return encode_cursor(*position)
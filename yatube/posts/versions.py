@@ -0,0 +1,52 @@
+from django.db import connection
+
+from .models import FeedVersion
+
+# Версия, общая для всех лент. Её повышают записи в обход сигналов
+# (bulk_create в import_posts), после которых неизвестно, какие
+# ленты изменились.
+ALL_FEEDS = '*'
+
+
+def get_versions(*feeds):
+    """Версии лент одним запросом: {лента: (общая версия, версия ленты)}.
+    Ленты, которые ещё не менялись, имеют версию 0."""
+    rows = dict(FeedVersion.objects.filter(
+        feed__in=(ALL_FEEDS, *feeds)
+    ).values_list('feed', 'version'))
+    common = rows.get(ALL_FEEDS, 0)
+    return {feed: (common, rows.get(feed, 0)) for feed in feeds}
+
+
+def feed_version(request, feed):
+    """Версия ленты, прочитанная один раз за запрос: ETag и кеш
+    лент одного запроса сверяются с одной и той же версией."""
+    if not hasattr(request, '_feed_versions'):
+        request._feed_versions = {}
+    if feed not in request._feed_versions:
+        request._feed_versions.update(get_versions(feed))
+    return request._feed_versions[feed]
+
+
+def bump_versions(*feeds):
+    """Повышает версии лент в текущей транзакции и возвращает новые
+    версии, как get_versions. Строки лент, которые меняются впервые,
+    создаются тем же запросом (INSERT ... ON CONFLICT есть в SQLite
+    и PostgreSQL); ленты упорядочены, чтобы параллельные записи
+    блокировали строки в одном порядке."""
+    feeds = sorted(set(feeds))
+    table = FeedVersion._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (feed, version) VALUES '
+            + ', '.join(['(%s, 1)'] * len(feeds))
+            + ' ON CONFLICT (feed) DO UPDATE'
+            + f' SET version = {table}.version + 1',
+            feeds
+        )
+    return get_versions(*feeds)
+
+
+def bump_all_versions():
+    """Меняет версии всех лент, например после bulk_create."""
+    bump_versions(ALL_FEEDS)
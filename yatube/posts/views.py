@@ -1,62 +1,129 @@
 from django.shortcuts import render, get_object_or_404
 from django.shortcuts import redirect
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.http import urlencode
+from django.views.decorators.http import condition
 
+from core.decorators import staff_required
+
+from .cache import GROUP_FEED, INDEX_FEED, PROFILE_FEED
+from .cache import cache_anonymous_page, page_cache_stats
+from . import conditional
+from .export import FORMATS, export_lines, iter_posts, parse_moment
 from .models import Post, Group, User
-from .utils import split_pages
+from .counters import get_author_posts_count
+from .search import search_posts
+from .utils import elided_page_range, split_pages
 from .forms import PostForm
 
 
 VIEW_ELEMENTS = 10
 
 
+# Выборки постов для лент, общие для HTML-страниц и JSON API.
+def index_posts():
+    return Post.objects.all()
+
+
+def group_feed_posts(slug):
+    group = get_object_or_404(Group, slug=slug)
+    return group, group.posts.all()
+
+
+def profile_feed_posts(username):
+    author = get_object_or_404(User, username=username)
+    return author, author.posts.all()
+
+
 # Главная страница
+@condition(etag_func=conditional.index_etag)
+@cache_anonymous_page(INDEX_FEED)
 def index(request):
     '''Передаёт в шаблон posts/index.html
     десять объектов модели Post на каждой странице.'''
     template = 'posts/index.html'
-    post_list = Post.objects.all()
+    post_list = index_posts().feed()
     context = {
-        'page_obj': split_pages(request, post_list, VIEW_ELEMENTS),
+        'page_obj': split_pages(
+            request, post_list, VIEW_ELEMENTS, timeline=INDEX_FEED),
     }
     return render(request, template, context)
 
 
 # Страница с групповыми постами
+@condition(etag_func=conditional.group_etag)
+@cache_anonymous_page(GROUP_FEED)
 def group_posts(request, slug):
     '''Передаёт в шаблон posts/group_list.html
     десять объектов модели Post на каждой странице,
     отфильтрованных по полю group,
     и содержимое для тега <title>.'''
     template = 'posts/group_list.html'
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    group, post_list = group_feed_posts(slug)
+    post_list = post_list.feed()
     context = {
         'group': group,
-        'page_obj': split_pages(request, post_list, VIEW_ELEMENTS),
+        'page_obj': split_pages(
+            request, post_list, VIEW_ELEMENTS, count=group.posts_count,
+            timeline=GROUP_FEED.format(slug=slug)),
     }
     return render(request, template, context)
 
 
+@condition(etag_func=conditional.profile_etag)
+@cache_anonymous_page(PROFILE_FEED)
 def profile(request, username):
     """Передает автора с указнным username в шаблон posts/profile
     и его посты по 10 штук на страницу"""
     template = 'posts/profile.html'
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
+    author, post_list = profile_feed_posts(username)
+    post_list = post_list.feed()
+    posts_count = get_author_posts_count(author)
     context = {
-        'page_obj': split_pages(request, post_list, VIEW_ELEMENTS),
+        'page_obj': split_pages(
+            request, post_list, VIEW_ELEMENTS, count=posts_count,
+            timeline=PROFILE_FEED.format(username=username)),
         'author': author,
+        'posts_count': posts_count,
     }
     return render(request, template, context)
 
 
+@condition(etag_func=conditional.post_etag)
 def post_detail(request, post_id):
     """Передает пост с указанной post_id в шабон posts/post_detail"""
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), id=post_id)
     context = {
         'post': post,
+        'author_posts_count': get_author_posts_count(post.author),
+    }
+    return render(request, template, context)
+
+
+def search(request):
+    """Передает в шаблон posts/search.html посты, найденные
+    по запросу q, от более подходящих к менее подходящим,
+    по 10 штук на страницу."""
+    template = 'posts/search.html'
+    query = request.GET.get('q', '').strip()
+    # Постранично делится список id: COUNT(*) и OFFSET по постам не нужны.
+    page_obj = Paginator(
+        search_posts(query) if query else [], VIEW_ELEMENTS
+    ).get_page(request.GET.get('page'))
+    page_obj.elided_page_range = elided_page_range(page_obj)
+    posts = Post.objects.feed().in_bulk(page_obj.object_list)
+    page_obj.object_list = [
+        posts[post_id] for post_id in page_obj.object_list
+        if post_id in posts
+    ]
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': urlencode({'q': query}) + '&',
     }
     return render(request, template, context)
 
@@ -91,7 +158,7 @@ def post_edit(request, post_id):
     template = 'posts/create_post.html'
 
     if request.method == 'GET':
-        if request.user != post.author:
+        if request.user.pk != post.author_id:
             return redirect('posts:post_detail', post_id=post.id)
         form = PostForm(instance=post)
 
@@ -108,3 +175,40 @@ def post_edit(request, post_id):
     }
 
     return render(request, template, context)
+
+
+@staff_required
+def cache_stats(request):
+    """Отдаёт счётчики попаданий и промахов кеша страниц лент."""
+    return JsonResponse(page_cache_stats())
+
+
+@staff_required
+def export_posts(request):
+    """Потоково отдаёт выгрузку постов в NDJSON или CSV
+    с фильтрами по группе, автору и дате публикации."""
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in FORMATS:
+        return JsonResponse({'error': 'Неизвестный формат'}, status=400)
+    try:
+        since = parse_moment(request.GET.get('since'))
+        until = parse_moment(request.GET.get('until'))
+    except ValueError as error:
+        return JsonResponse({'error': str(error)}, status=400)
+    rows = iter_posts(
+        group=request.GET.get('group'),
+        author=request.GET.get('author'),
+        since=since,
+        until=until,
+    )
+    content_type = {
+        'ndjson': 'application/x-ndjson',
+        'csv': 'text/csv',
+    }[export_format]
+    response = StreamingHttpResponse(
+        export_lines(export_format, rows),
+        content_type=f'{content_type}; charset=utf-8'
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="posts.{export_format}"')
+    return response
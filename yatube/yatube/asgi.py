@@ -0,0 +1,26 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Django 2.2 has no ASGI support of its own: core.asgi.ASGIHandler runs the
+WSGI handler in a thread pool of ASGI_THREADS threads.
+
+    uvicorn yatube.asgi:application
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+from django.conf import settings  # noqa: E402
+
+from core.asgi import ASGIHandler  # noqa: E402
+from core.templates import warm_templates  # noqa: E402
+
+application = ASGIHandler(get_wsgi_application())
+
+# С кешем шаблонов воркер компилирует их до первого запроса.
+if settings.TEMPLATE_CACHE:
+    warm_templates()
@@ -49,6 +49,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.PerformanceMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.QueryAuditMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -63,7 +68,9 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates с замером времени отрисовки для
+        # core.middleware.PerformanceMiddleware.
+        'BACKEND': 'core.templates.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -78,7 +85,24 @@ TEMPLATES = [
     },
 ]
 
+# Кеш скомпилированных шаблонов в памяти процесса: шаблоны разбираются
+# один раз, а не при каждой отрисовке, но правки файлов подхватываются
+# только после перезапуска. По умолчанию включён без DEBUG,
+# TEMPLATE_CACHE=1 или 0 задаёт его явно. Воркеры с кешем компилируют
+# все шаблоны при запуске (core.templates.warm_templates).
+TEMPLATE_CACHE = os.getenv('TEMPLATE_CACHE', str(int(not DEBUG))) == '1'
+if TEMPLATE_CACHE:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
+# Потоки, в которых core.asgi.ASGIHandler выполняет представления.
+ASGI_THREADS = 8
 
 
 # Database
@@ -88,7 +112,170 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Соединение переиспользуется запросами одного потока.
+        'CONN_MAX_AGE': 60,
+    }
+}
+
+# Реплики для чтения: DATABASE_REPLICAS=replica1,replica2 добавляет
+# БД replica1.sqlite3 и replica2.sqlite3 рядом с основной. Скопировать
+# в них основную БД: python manage.py sync_replicas.
+DATABASE_REPLICAS = [
+    alias for alias in os.getenv('DATABASE_REPLICAS', '').split(',') if alias
+]
+for alias in DATABASE_REPLICAS:
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': os.path.join(BASE_DIR, f'{alias}.sqlite3'),
+        # В тестах реплика - та же тестовая БД.
+        'TEST': {'MIRROR': 'default'},
     }
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# round_robin или least_loaded.
+REPLICA_SELECTION = 'round_robin'
+# Представления, которые только читают и могут читать из реплики.
+REPLICA_VIEWS = {
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'about:author',
+    'about:tech',
+}
+# Сколько секунд после записи пользователь читает из основной БД.
+PRIMARY_PIN_SECONDS = 10
+
+# Прагмы, которые core.db выставляет каждому соединению с SQLite.
+SQLITE_PRAGMAS = {
+    # Сколько мс ждать освобождения блокировки, прежде чем вернуть
+    # "database is locked". Выставляется первым: смена журнала
+    # тоже может ждать блокировку.
+    'busy_timeout': 5000,
+    # Журнал WAL: запись не блокирует чтение.
+    'journal_mode': 'wal',
+    # С WAL fsync при каждой транзакции не нужен для целостности БД.
+    'synchronous': 'normal',
+    # Кеш страниц в КиБ (отрицательное значение) и отображение файла
+    # БД в память в байтах.
+    'cache_size': -20000,
+    'mmap_size': 128 * 1024 * 1024,
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Кеш отрисованных карточек постов ({% cache %} в includes/post.html).
+    # Ключи версионируются датой изменения поста, поэтому записи не
+    # устаревают по времени, а вытесняются LocMemCache по принципу LRU.
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'template-fragments',
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+    # Кеш страниц лент для неавторизованных пользователей.
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'pages',
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    },
+    # Ленты: id новейших постов главной, каждой группы и каждого автора.
+    # Каждая лента сверяется при чтении с версией ленты в БД
+    # (posts.versions) и видит записи других процессов, поэтому
+    # не устаревает по времени.
+    'timelines': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'timelines',
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
+}
+
+PAGE_CACHE_ALIAS = 'pages'
+PAGE_CACHE_TIMEOUT = 60 * 5
+
+TIMELINE_CACHE_ALIAS = 'timelines'
+# Сколько новейших постов каждой ленты хранить в кеше лент. Столько же
+# постов доступно по номерам страниц, дальше лента листается по курсору.
+TIMELINE_SIZE = 1000
+
+
+# Performance metrics
+# core.middleware.PerformanceMiddleware
+
+# Сколько последних запросов каждого представления учитывать в перцентилях.
+PERFORMANCE_WINDOW = 1000
+# Запросы дольше порога пишутся в лог core.performance с уровнем WARNING.
+PERFORMANCE_SLOW_REQUEST_MS = 500
+
+# Response compression
+# core.middleware.CompressionMiddleware
+
+# Убирать из HTML отступы, пустые строки и комментарии шаблонов.
+HTML_MINIFY = True
+# Ответы меньше порога в байтах не сжимаются: выигрыш меньше заголовков.
+COMPRESSION_MIN_SIZE = 1024
+
+# Query audit
+# core.middleware.QueryAuditMiddleware и core.queries.QueryAuditor
+
+# Запросы к БД дольше порога считаются медленными.
+QUERY_AUDIT_SLOW_MS = 100
+# Превышение бюджета и повтор одной формы SQL поднимают QueryAuditError
+# вместо записи в лог. manage.py test включает это через TEST_RUNNER.
+QUERY_AUDIT_FAIL = False
+TEST_RUNNER = 'core.runner.QueryAuditRunner'
+# Бюджет запросов к БД по имени URL. Превышение, повтор одной формы SQL
+# и медленные запросы пишутся в лог core.queries. Бюджеты лент рассчитаны
+# на первое чтение ленты после перезапуска или чужой записи: лента
+# строится одним дополнительным запросом (posts.timeline), дальше
+# страницы читаются на запрос быстрее.
+QUERY_BUDGETS = {
+    'posts:index': 6,
+    'posts:group_list': 6,
+    'posts:profile': 7,
+    'posts:post_detail': 6,
+    'posts:post_create': 10,
+    'posts:post_edit': 11,
+    'posts:search': 4,
+    'posts:api_index': 1,
+    'posts:api_group_list': 2,
+    'posts:api_profile': 2,
+    'posts:api_post_detail': 1,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core.performance': {
+            'handlers': ['console'],
+            'level': os.getenv('PERFORMANCE_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+        'core.queries': {
+            'handlers': ['console'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
 }
 
 
@@ -129,8 +316,22 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
 
 STATIC_URL = '/static/'
-STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static'),
-                    os.path.join(BASE_DIR, 'img')]
+# Картинки лежат в static/img.
+STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# Сборка статики: python manage.py collectstatic кладёт в STATIC_ROOT
+# файлы с хешем содержимого в именах (style.3f2a1b9c04de.css), манифест
+# staticfiles.json и сжатые gzip (и brotli, если установлен пакет
+# brotli) копии текстовых файлов. {% static %} ссылается на файлы
+# с хешем, поэтому их можно кешировать навсегда. По умолчанию включена
+# без DEBUG, STATIC_MANIFEST=1 или 0 задаёт её явно.
+STATIC_MANIFEST = os.getenv('STATIC_MANIFEST', str(int(not DEBUG))) == '1'
+if STATIC_MANIFEST:
+    STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+# Без прокси перед приложением статику из STATIC_ROOT отдаёт
+# core.middleware.StaticFilesMiddleware: STATIC_SERVE=1.
+STATIC_SERVE = os.getenv('STATIC_SERVE', '0') == '1'
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
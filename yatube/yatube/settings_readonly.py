@@ -0,0 +1,34 @@
+"""
+Settings for read-only workers that serve feeds (for example, from a read
+replica): no admin, no messages, no password and admin URL routing.
+
+    DJANGO_SETTINGS_MODULE=yatube.settings_readonly gunicorn yatube.wsgi
+
+Before Python 3.12, also set SETUPTOOLS_USE_DISTUTILS=stdlib in the worker
+environment. Django 2.2 imports distutils, and the setuptools replacement
+for it loads setuptools and pkg_resources (~150 modules, ~10 MB per
+worker). The variable has to be set before the interpreter starts.
+
+Compare startup time and memory with the full settings:
+
+    python manage.py profile_startup --compare yatube.settings_readonly
+"""
+import copy
+
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS, MIDDLEWARE, TEMPLATES
+
+SLIM_APPS = ('django.contrib.admin', 'django.contrib.messages')
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in SLIM_APPS]
+
+MIDDLEWARE = [
+    middleware for middleware in MIDDLEWARE
+    if middleware != 'django.contrib.messages.middleware.MessageMiddleware'
+]
+
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]['OPTIONS']['context_processors'].remove(
+    'django.contrib.messages.context_processors.messages')
+
+ROOT_URLCONF = 'yatube.urls_readonly'
@@ -22,5 +22,6 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
-    path('about', include('about.urls', namespace='about'))
+    path('about', include('about.urls', namespace='about')),
+    path('stats/', include('core.urls', namespace='core')),
 ]
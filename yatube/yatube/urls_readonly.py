@@ -0,0 +1,23 @@
+"""URL configuration for read-only workers (yatube.settings_readonly).
+
+Only the read views are routed: the feeds, post pages, search and about
+pages. Creating and editing posts, the JSON API, export, cache stats and
+the auth pages stay on the main workers; the header skips links to
+routes that are not mounted here.
+"""
+from django.urls import include, path
+
+from posts import views
+
+posts_patterns = [
+    path('', views.index, name='index'),
+    path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('profile/<str:username>/', views.profile, name='profile'),
+    path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('search/', views.search, name='search'),
+]
+
+urlpatterns = [
+    path('', include((posts_patterns, 'posts'))),
+    path('about', include('about.urls', namespace='about')),
+]
@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+from core.templates import warm_templates  # noqa: E402
+
+# С кешем шаблонов воркер компилирует их до первого запроса.
+if settings.TEMPLATE_CACHE:
+    warm_templates()